@@ -0,0 +1,102 @@
+// Clientside callbacks for the optional browser-side mode of display.py (LIDA_CLIENTSIDE=1).
+// They read the pre-aggregated statistics embedded in the "dashboard-data" store.
+(function () {
+    var COLORS = [
+        "#636efa", "#EF553B", "#00cc96", "#ab63fa", "#FFA15A",
+        "#19d3f3", "#FF6692", "#B6E880", "#FF97FF", "#FECB52",
+    ];
+
+    function barChart(column, distribution) {
+        if (!distribution) {
+            return {data: [], layout: {}};
+        }
+        var traces = distribution.categories.map(function (category, i) {
+            return {
+                type: "bar",
+                name: category,
+                legendgroup: category,
+                x: [category],
+                y: [distribution.percentages[i]],
+                marker: {color: COLORS[i % COLORS.length]},
+                hovertemplate: "color=" + category + "<br>" + column + "=%{x}<br>value=%{y}<extra></extra>",
+                showlegend: true,
+            };
+        });
+
+        return {
+            data: traces,
+            layout: {
+                barmode: "relative",
+                margin: {t: 60},
+                xaxis: {title: {text: column}, tickvals: [], ticktext: []},
+                yaxis: {title: {text: "Percentage (%)"}},
+                legend: {title: {text: "Categories"}, tracegroupgap: 0},
+            },
+        };
+    }
+
+    function stackedChart(breakdown) {
+        if (!breakdown) {
+            return {data: [], layout: {}};
+        }
+        var traces = breakdown.categories.map(function (category, i) {
+            return {
+                type: "bar",
+                name: category,
+                x: breakdown.areas,
+                y: breakdown.percentages[i],
+                marker: {color: COLORS[i % COLORS.length]},
+                hovertemplate: category + "<br>%{x}: %{y:.1f}%<extra></extra>",
+            };
+        });
+
+        return {
+            data: traces,
+            layout: {
+                barmode: "stack",
+                yaxis: {title: {text: "Percentage (%)"}, range: [0, 100]},
+                legend: {title: {text: "Categories"}},
+            },
+        };
+    }
+
+    // Compact mode (LIDA_COMPACT_RESPONSES=1) stores tables column-oriented; DataTable wants row records
+    function toRecords(table) {
+        if (!table || !table.columns) {
+            return table;
+        }
+        var length = table.columns.length ? table.values[0].length : 0;
+        var records = [];
+        for (var row = 0; row < length; row++) {
+            var record = {};
+            table.columns.forEach(function (column, i) {
+                record[column] = table.values[i][row];
+            });
+            records.push(record);
+        }
+        return records;
+    }
+
+    function statistics(entry) {
+        return [entry[0], toRecords(entry[1]), entry[2], toRecords(entry[3])];
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        lida: {
+            regional_breakdown: function (column, data) {
+                return stackedChart(data.regional[column]);
+            },
+            national_effectiveness: function (column, data) {
+                return barChart(column, data.national[column]);
+            },
+            la_statistics: function (localAuthority, data) {
+                var entry = data.la[localAuthority];
+                return statistics(entry ? entry.statistics : data.empty_statistics);
+            },
+            la_effectiveness: function (localAuthority, column, data) {
+                var entry = data.la[localAuthority];
+                return barChart(column, entry ? entry.effectiveness[column] : null);
+            },
+        },
+    });
+})();
@@ -0,0 +1,253 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Optional
+
+import pandas as pd  # type: ignore
+
+from datasets import Datasets, get_available_engines, read_excel_sheet, registry, select_engine
+from manipulations import BarChartBuilder, LAFilter, TableBuilder
+from result_cache import result_cache
+from rollups import RollupBuilder
+from synthetic import SyntheticOfstedGenerator
+
+
+def time_call(func: Callable, repeat: int = 5, setup: Callable = None) -> dict:
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "repeat": repeat,
+        "min_ms": min(samples),
+        "median_ms": statistics.median(samples),
+        "mean_ms": statistics.fmean(samples),
+        "max_ms": max(samples),
+    }
+
+
+def scale_dataset(dataset: pd.DataFrame, scale: int) -> pd.DataFrame:
+    if scale == 1:
+        return dataset
+
+    return pd.concat([dataset] * scale, ignore_index=True)
+
+
+def callback_requests(
+    local_authority: str, national_column: str, la_column: str, regional_column: Optional[str] = None
+) -> dict:
+    # Bodies in the shape the Dash renderer posts to /_dash-update-component
+    return {
+        "display_regional_breakdown": {
+            "output": "graph-1.figure",
+            "outputs": {"id": "graph-1", "property": "figure"},
+            "inputs": [{"id": "dropdown-1", "property": "value", "value": regional_column or national_column}],
+            "changedPropIds": ["dropdown-1.value"],
+        },
+        "display_bar_chart": {
+            "output": "outcome.figure",
+            "outputs": {"id": "outcome", "property": "figure"},
+            "inputs": [{"id": "effectiveness-dropdown", "property": "value", "value": national_column}],
+            "changedPropIds": ["effectiveness-dropdown.value"],
+        },
+        "display_la_level_provision_type_and_places_statistics": {
+            "output": (
+                "..la-facilities-count.children...la-provision-types.data"
+                "...la-places-count.children...la-places-by-provision-type.data.."
+            ),
+            "outputs": [
+                {"id": "la-facilities-count", "property": "children"},
+                {"id": "la-provision-types", "property": "data"},
+                {"id": "la-places-count", "property": "children"},
+                {"id": "la-places-by-provision-type", "property": "data"},
+            ],
+            "inputs": [{"id": "local-authority", "property": "value", "value": local_authority}],
+            "changedPropIds": ["local-authority.value"],
+        },
+        "display_la_level_effectiveness_barchart": {
+            "output": "la-level-effectiveness.figure",
+            "outputs": {"id": "la-level-effectiveness", "property": "figure"},
+            "inputs": [
+                {"id": "local-authority", "property": "value", "value": local_authority},
+                {"id": "la-level-effectiveness-dropdown", "property": "value", "value": la_column},
+            ],
+            "changedPropIds": ["la-level-effectiveness-dropdown.value"],
+        },
+    }
+
+
+def benchmark_loads(repeat: int) -> dict:
+    results = {}
+    for builder in (BarChartBuilder, TableBuilder):
+        sheet = builder.sheet_name
+        # Populate the Arrow cache and the registry first so "warm" never includes a parse
+        registry.get(sheet, builder.header)
+        results[sheet] = {
+            "cold": time_call(lambda s=sheet, h=builder.header: Datasets(use_cache=False).read_sheet(s, h), repeat),
+            "warm": time_call(lambda s=sheet, h=builder.header: Datasets().read_sheet(s, h), repeat),
+            "registry": time_call(lambda s=sheet, h=builder.header: registry.get(s, h), repeat),
+        }
+        registry.get(sheet, builder.header, compact=True)
+
+    results["memory"] = registry.get_memory_report()
+
+    return results
+
+
+def benchmark_engines(sources: Optional[list[str]] = None, repeat: int = 1) -> dict:
+    # Every installed reader on every bundled workbook, parsing straight from the file with no cache involved
+    sources = sources or sorted(glob.glob("data/*.xlsx") + glob.glob("data/*.ods"))
+    results = {}
+    for source in sources:
+        results[os.path.basename(source)] = {
+            "selected": select_engine(source),
+            "engines": {
+                engine: {
+                    builder.sheet_name: time_call(
+                        lambda s=source, e=engine, b=builder: read_excel_sheet(s, b.sheet_name, b.header, e), repeat
+                    )
+                    for builder in (BarChartBuilder, TableBuilder)
+                }
+                for engine in get_available_engines(source)
+            },
+        }
+
+    return results
+
+
+def benchmark_aggregations(national: pd.DataFrame, provider: pd.DataFrame, repeat: int) -> dict:
+    bar_chart_builder = BarChartBuilder(national)
+    table_builder = TableBuilder(provider)
+    la_filter = LAFilter(provider)
+
+    national_column = bar_chart_builder.get_dropdown_options()[0]["value"]
+    la_column = la_filter.get_la_effectiveness_dropdown_options()[0]["value"]
+    local_authority = provider["Local authority"].mode()[0]
+    la_filter.get_la_index()
+    la_data = la_filter.filter_dataset_by_LA(local_authority)
+
+    methods = {
+        "BarChartBuilder.supply_bar_chart_info": lambda: bar_chart_builder.supply_bar_chart_info(national_column),
+        "TableBuilder.calculate_total_number_of_facilities": lambda: (
+            table_builder.calculate_total_number_of_facilities(provider)
+        ),
+        "TableBuilder.calculate_provision_types_breakdown": lambda: (
+            table_builder.calculate_provision_types_breakdown(provider)
+        ),
+        "TableBuilder.calculate_total_number_of_places": lambda: (
+            table_builder.calculate_total_number_of_places(provider)
+        ),
+        "TableBuilder.calculate_places_by_provision_type": lambda: (
+            table_builder.calculate_places_by_provision_type(provider)
+        ),
+        "LAFilter.build_la_index": lambda: la_filter.build_la_index(provider),
+        "LAFilter.get_la_statistics": lambda: la_filter.get_la_statistics(local_authority),
+        "LAFilter.filter_dataset_by_LA": lambda: la_filter.filter_dataset_by_LA(local_authority),
+        "LAFilter.get_la_dropdown_options": la_filter.get_la_dropdown_options,
+        "LAFilter.supply_la_level_bar_chart_info": lambda: (
+            la_filter.supply_la_level_bar_chart_info(la_data, la_column)
+        ),
+    }
+
+    return {name: time_call(method, repeat) for name, method in methods.items()}
+
+
+def benchmark_callbacks(national: pd.DataFrame, provider: pd.DataFrame, repeat: int) -> dict:
+    import display  # pylint: disable=import-outside-toplevel
+
+    display.bar_chart_builder = BarChartBuilder(national)
+    display.table_builder = TableBuilder(provider)
+    display.la_filter = LAFilter(provider)
+    display.rollup_builder = RollupBuilder(national)
+    client = display.create_app(clientside=False).server.test_client()
+
+    requests = callback_requests(
+        local_authority=provider["Local authority"].mode()[0],
+        national_column=display.bar_chart_builder.get_dropdown_options()[0]["value"],
+        la_column=display.la_filter.get_la_effectiveness_dropdown_options()[0]["value"],
+    )
+
+    def post(body: dict) -> None:
+        response = client.post("/_dash-update-component", json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"callback failed with HTTP {response.status_code}")
+
+    results = {}
+    backend = result_cache.backend
+    for name, body in requests.items():
+        # The result cache is switched off rather than cleared: with Redis, clearing would empty a shared database
+        result_cache.configure(None)
+        try:
+            uncached = time_call(lambda b=body: post(b), repeat, setup=display.figure_cache.clear)
+        finally:
+            result_cache.configure(backend)
+        results[name] = {"uncached": uncached, "cached": time_call(lambda b=body: post(b), repeat)}
+
+    return results
+
+
+def run(scales: list[int], repeat: int, synthetic: bool = False, engine_repeat: int = 0) -> dict:
+    report = {
+        "environment": {
+            "python": sys.version.split()[0],
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+        },
+        "load": benchmark_loads(repeat),
+        "rows": {},
+        "aggregation": {},
+        "callbacks": {},
+    }
+
+    national = registry.get(BarChartBuilder.sheet_name, BarChartBuilder.header)
+    provider = registry.get(TableBuilder.sheet_name, TableBuilder.header)
+    for scale in scales:
+        if synthetic:
+            generator = SyntheticOfstedGenerator(providers=len(provider) * scale, local_authorities=len(national))
+            scaled_provider = generator.provider_level()
+        else:
+            scaled_provider = scale_dataset(provider, scale)
+        label = f"{scale}x"
+        report["rows"][label] = len(scaled_provider)
+        report["aggregation"][label] = benchmark_aggregations(national, scaled_provider, repeat)
+        report["callbacks"][label] = benchmark_callbacks(national, scaled_provider, repeat)
+    if engine_repeat:
+        report["engines"] = benchmark_engines(repeat=engine_repeat)
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dataset loads, aggregations and Dash callbacks.")
+    parser.add_argument(
+        "--scales", type=int, nargs="+", default=[1, 10, 100], help="provider dataset multipliers, e.g. 1 10 100 1000"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions per measurement")
+    parser.add_argument(
+        "--synthetic", action="store_true", help="generate scaled provider data instead of replicating the workbook"
+    )
+    parser.add_argument(
+        "--engines",
+        type=int,
+        default=0,
+        metavar="REPEAT",
+        help="also time every installed reader engine on the bundled workbooks, REPEAT times each (odf is slow)",
+    )
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    result = run(args.scales, args.repeat, args.synthetic, args.engines)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as target:
+            json.dump(result, target, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
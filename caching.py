@@ -0,0 +1,86 @@
+import functools
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+class FigureCache:
+
+    def __init__(
+        self,
+        maxsize: int = 512,
+    ) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        # Decoding the stored JSON is far cheaper than rebuilding the px figure
+        return json.loads(payload)
+
+    def set(self, key: Hashable, figure) -> str:
+        payload = figure if isinstance(figure, str) else figure.to_json()
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return payload
+
+    def get_or_build(self, key: Hashable, build: Callable):
+        figure = self.get(key)
+        if figure is None:
+            figure = json.loads(self.set(key, build()))
+
+        return figure
+
+    def memoize(self, version: Callable[[], str]):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = (func.__name__, args, tuple(sorted(kwargs.items())), version())
+
+                return self.get_or_build(key, lambda: func(*args, **kwargs))
+
+            return wrapper
+
+        return decorator
+
+    def retain(self, keep: Callable[[Hashable], bool]) -> int:
+        # Drops entries whose key fails `keep`, e.g. figures built from a dataset version no longer served
+        with self._lock:
+            stale = [key for key in self._entries if not keep(key)]
+            for key in stale:
+                del self._entries[key]
+
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,29 +1,759 @@
+import contextlib
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import shutil
+import threading
+from typing import Callable, Iterable, Optional, Union
+
 import pandas as pd  # type: ignore
 
+from instrumentation import metrics, rows_of_first_result, rows_of_result, timed
+
 filepath: str = "data/Childrens_social_care_in_England_2022_underlying_data.xlsx"
+cache_dir: str = "data/.cache"
+partitions_dir: str = "data/partitions"
+shared_data_env: str = "LIDA_SHARED_DATA"
+engine_env: str = "LIDA_EXCEL_ENGINE"
+compact_default: bool = os.environ.get("LIDA_COMPACT", "") not in ("", "0")
+
+# Sheet name template and header row for each kind of sheet in an Ofsted release
+SHEETS: dict[str, tuple[str, int]] = {
+    "LA_level": ("LA_level_at_31_Mar_{year}", 2),
+    "Provider_level": ("Provider_level_at_31_Mar_{year}", 4),
+}
+
+# Readers for each source format, fastest first, with the package each needs; the first installed one is used.
+# "streaming" is the event-driven parser in streaming.py: it reads both bundled .ods sheets in ~1s against ~50s for
+# odfpy, and matches openpyxl on .xlsx, which stays ahead of it as pandas' reference reader.
+ENGINES: dict[str, tuple[tuple[str, Optional[str]], ...]] = {
+    ".xlsx": (("calamine", "python_calamine"), ("openpyxl", "openpyxl"), ("streaming", "openpyxl")),
+    ".xlsm": (("calamine", "python_calamine"), ("openpyxl", "openpyxl"), ("streaming", "openpyxl")),
+    ".ods": (("calamine", "python_calamine"), ("streaming", None), ("odf", "odf")),
+}
+
+# Columns the builders read, keyed by sheet prefix. The trailing effectiveness judgements are always kept
+# because BarChartBuilder and LAFilter select them by position from the end of the frame.
+COMPACT_SCHEMAS: dict[str, dict] = {
+    "LA_level": {
+        "keep": ["Local authority name", "Ofsted region"],
+        "trailing": 4,
+        "category": ["Local authority name", "Ofsted region"],
+        "downcast": {},
+    },
+    "Provider_level": {
+        "keep": ["URN", "Provision type", "Ofsted region", "Local authority", "Places"],
+        "trailing": 5,
+        "category": ["Provision type", "Ofsted region", "Local authority"],
+        "downcast": {"Places": "float32"},
+    },
+}
 
 
 class Datasets:
 
     def __init__(
         self,
+        source: str = filepath,
+        use_cache: bool = True,
+        compact: bool = False,
+        chunksize: Optional[int] = None,
+        engine: Optional[str] = None,
+        usecols: Optional[list[str]] = None,
+        year: Optional[int] = None,
     ) -> None:
-        self.filepath = filepath
+        self.filepath = source
+        self.year = year if year is not None else infer_year(source)
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.compact = compact
+        self.chunksize = chunksize
+        # None picks the fastest installed engine for the source format when a sheet is first parsed
+        self.engine = engine
+        self.usecols = usecols
+        self.memory_reports: dict[str, dict] = {}
 
+    @timed(rows=rows_of_result)
     def extract_data_for_national_effectiveness(self):
-        df = pd.read_excel(
-            self.filepath,
-            "LA_level_at_31_Mar_2022",
-            header=2,
-        )
+        df = self.read_sheet(self.get_sheet_name("LA_level"), header=SHEETS["LA_level"][1])
 
         return df
 
+    @timed(rows=rows_of_result)
     def extract_data_for_provision_types_and_places(self):
-        df = pd.read_excel(
-            self.filepath,
-            "Provider_level_at_31_Mar_2022",
-            header=4,
-        )
+        df = self.read_sheet(self.get_sheet_name("Provider_level"), header=SHEETS["Provider_level"][1])
 
         return df
+
+    def get_sheet_name(self, kind: str) -> str:
+        if self.year is not None:
+            return get_sheet_name(kind, self.year)
+
+        # Without a year, in the file name or given, the workbook must hold exactly one sheet of this kind
+        pattern = re.compile(SHEETS[kind][0].format(year=r"\d{4}"))
+        matches = [name for name in get_sheet_names(self.filepath) if pattern.fullmatch(name)]
+        if len(matches) != 1:
+            raise ValueError(
+                f"Cannot tell which {kind} sheet to read from {self.filepath}: found {matches or 'none'}; "
+                "pass year= to Datasets"
+            )
+
+        return matches[0]
+
+    @timed(rows=rows_of_result)
+    def read_sheet(self, sheet_name: str, header: int) -> pd.DataFrame:
+        df = self._read_full_sheet(sheet_name, header)
+        if not self.compact:
+            return df
+
+        compacted = compact_frame(df, get_compact_schema(sheet_name))
+        self.memory_reports[sheet_name] = {
+            "before_bytes": memory_footprint(df),
+            "after_bytes": memory_footprint(compacted),
+            "dropped_columns": [column for column in df.columns if column not in compacted.columns],
+        }
+
+        return compacted
+
+    def _read_full_sheet(self, sheet_name: str, header: int) -> pd.DataFrame:
+        if not self.use_cache:
+            return self._parse_sheet(sheet_name, header)
+
+        cache_path = self.get_cache_path(sheet_name, header)
+        if os.path.exists(cache_path):
+            try:
+                df = _read_columnar(cache_path)
+            except FileNotFoundError:
+                # Swept by a process that saw a newer workbook; parse it afresh below
+                pass
+            else:
+                metrics.increment("lida_columnar_cache_lookups_total", result="hit")
+                return df
+
+        metrics.increment("lida_columnar_cache_lookups_total", result="miss")
+        df = normalise_mixed_columns(self._parse_sheet(sheet_name, header))
+        self._write_cache(df, cache_path)
+
+        return df
+
+    @timed(rows=rows_of_result)
+    def _parse_sheet(self, sheet_name: str, header: int) -> pd.DataFrame:
+        if self.chunksize is None:
+            engine = self.engine or select_engine(self.filepath)
+            return read_excel_sheet(self.filepath, sheet_name, header, engine, self.usecols)
+
+        # pylint: disable-next=import-outside-toplevel
+        from streaming import ingest_sheet, read_chunked
+
+        # Rows are streamed into Parquet parts, so the workbook is never held in memory as a whole
+        chunk_dir = os.path.join(self.cache_dir, f"chunks-{os.getpid()}-{threading.get_ident()}")
+        try:
+            ingest_sheet(self.filepath, sheet_name, header, chunk_dir, self.chunksize)
+            return read_chunked(chunk_dir, self.usecols).to_pandas()
+        finally:
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+
+    def get_cache_key(self, sheet_name: str, header: int) -> str:
+        stat = os.stat(self.filepath)
+        digest = hashlib.sha256()
+        digest.update(os.path.abspath(self.filepath).encode())
+        digest.update(f"{stat.st_mtime_ns}:{stat.st_size}:{sheet_name}:{header}".encode())
+        with open(self.filepath, "rb") as source:
+            for block in iter(lambda: source.read(1 << 20), b""):
+                digest.update(block)
+
+        return digest.hexdigest()[:16]
+
+    def get_content_key(self, sheet_name: str, header: int) -> str:
+        # Unlike get_cache_key, only what is read counts: touching or moving the workbook leaves it unchanged
+        digest = hashlib.sha256(f"{sheet_name}:{header}:".encode())
+        with open(self.filepath, "rb") as source:
+            for block in iter(lambda: source.read(1 << 20), b""):
+                digest.update(block)
+
+        return digest.hexdigest()[:16]
+
+    def get_cache_path(self, sheet_name: str, header: int) -> str:
+        stem = os.path.splitext(os.path.basename(self.filepath))[0]
+        key = self.get_cache_key(sheet_name, header)
+        variant = f"h{header}"
+        # A column subset is cached beside the full sheet rather than replacing it
+        if self.usecols is not None:
+            variant += f"-c{hashlib.sha256(json.dumps(list(self.usecols)).encode()).hexdigest()[:8]}"
+
+        return os.path.join(self.cache_dir, f"{stem}.{sheet_name}.{variant}.{key}{_columnar_suffix()}")
+
+    def clear_cache(self) -> None:
+        if not os.path.isdir(self.cache_dir):
+            return
+        stem = os.path.splitext(os.path.basename(self.filepath))[0]
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(f"{stem}."):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def _write_cache(self, df: pd.DataFrame, cache_path: str) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Entries for older versions of the same sheet are stale once the workbook changes. Other processes may
+        # be writing or reading the current entry at the same time, so it and any in-flight .tmp file are kept,
+        # and a file someone else removed first is not an error.
+        current = os.path.basename(cache_path)
+        prefix = current.rsplit(".", 2)[0] + "."
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix) and name != current and not name.endswith(".tmp"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+        tmp_path = f"{cache_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        _write_columnar(df, tmp_path, _columnar_suffix())
+        with contextlib.suppress(FileNotFoundError):
+            os.replace(tmp_path, cache_path)
+
+
+class DatasetRegistry:
+
+    def __init__(self) -> None:
+        self._frames: dict[tuple, pd.DataFrame] = {}
+        self._versions: dict[tuple, str] = {}
+        self._memory_reports: dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+        self._shared_checked = False
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sheet_name: str, header: int, source: str = filepath, compact: bool = False) -> pd.DataFrame:
+        key = (os.path.abspath(source), sheet_name, header, compact)
+        frame = self._get_frame(key)
+        if frame is None:
+            with self._lock:
+                self._attach_from_environment()
+                frame = self._frames.get(key)
+                if frame is None:
+                    frame = self._load(key)
+
+        # Changes made through the handed-out frame never reach the shared one (see _hand_out)
+        return _hand_out(frame)
+
+    def get_version(self, sheet_name: str, header: int, source: str = filepath, compact: bool = False) -> str:
+        key = (os.path.abspath(source), sheet_name, header, compact)
+        if key not in self._versions:
+            self.get(sheet_name, header, source, compact)
+
+        return self._versions[key]
+
+    def get_row_count(
+        self, sheet_name: str, header: int, source: str = filepath, compact: bool = False
+    ) -> Optional[int]:
+        # Without loading the frame or counting a lookup; None until it has been loaded
+        frame = self._frames.get((os.path.abspath(source), sheet_name, header, compact))
+
+        return len(frame) if frame is not None else None
+
+    def get_partitioned(
+        self,
+        kind: str,
+        years: Union[int, Iterable[int]],
+        compact: bool = False,
+        store: Optional["PartitionedStore"] = None,
+    ) -> pd.DataFrame:
+        store = store or PartitionedStore()
+        key = ("partitions", os.path.abspath(store.root), kind, normalise_years(years), compact)
+        frame = self._get_frame(key)
+        if frame is None:
+            with self._lock:
+                self._attach_from_environment()
+                frame = self._frames.get(key)
+                if frame is None:
+                    frame = self._load_partitions(key, store)
+
+        return _hand_out(frame)
+
+    def get_partitioned_version(
+        self,
+        kind: str,
+        years: Union[int, Iterable[int]],
+        compact: bool = False,
+        store: Optional["PartitionedStore"] = None,
+    ) -> str:
+        store = store or PartitionedStore()
+        key = ("partitions", os.path.abspath(store.root), kind, normalise_years(years), compact)
+        if key not in self._versions:
+            self.get_partitioned(kind, years, compact, store)
+
+        return self._versions[key]
+
+    def get_partitioned_row_count(
+        self,
+        kind: str,
+        years: Union[int, Iterable[int]],
+        compact: bool = False,
+        store: Optional["PartitionedStore"] = None,
+    ) -> Optional[int]:
+        store = store or PartitionedStore()
+        frame = self._frames.get(("partitions", os.path.abspath(store.root), kind, normalise_years(years), compact))
+
+        return len(frame) if frame is not None else None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+
+        return {
+            "size": len(self._frames),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def get_memory_report(self) -> dict[str, dict]:
+        return {_describe_key(key): report for key, report in self._memory_reports.items()}
+
+    def extract_data_for_national_effectiveness(self) -> pd.DataFrame:
+        return self.get("LA_level_at_31_Mar_2022", header=2)
+
+    def extract_data_for_provision_types_and_places(self) -> pd.DataFrame:
+        return self.get("Provider_level_at_31_Mar_2022", header=4)
+
+    def invalidate(self, source: Optional[str] = None, sheet_name: Optional[str] = None) -> None:
+        with self._lock:
+            for key in list(self._frames):
+                if source is not None and key[0] != os.path.abspath(source):
+                    continue
+                if sheet_name is not None and sheet_name not in (key[1], key[2]):
+                    continue
+                del self._frames[key]
+                del self._versions[key]
+                self._memory_reports.pop(key, None)
+
+    def reload(
+        self,
+        sheet_name: str,
+        header: int,
+        source: str = filepath,
+        compact: bool = False,
+        prepare: Optional[Callable[[pd.DataFrame, str], None]] = None,
+    ) -> str:
+        key = (os.path.abspath(source), sheet_name, header, compact)
+        # Read without the lock, so requests keep getting the current frame until the new one is ready
+        frame, version, report = self._read(key)
+        if prepare is not None:
+            prepare(_hand_out(frame), version)
+        with self._lock:
+            self._install(key, frame, version, report)
+
+        return version
+
+    def reload_partitioned(
+        self,
+        kind: str,
+        years: Union[int, Iterable[int]],
+        compact: bool = False,
+        store: Optional["PartitionedStore"] = None,
+        prepare: Optional[Callable[[pd.DataFrame, str], None]] = None,
+    ) -> str:
+        store = store or PartitionedStore()
+        key = ("partitions", os.path.abspath(store.root), kind, normalise_years(years), compact)
+        frame, version, report = self._read_partitions(key, store)
+        if prepare is not None:
+            prepare(_hand_out(frame), version)
+        with self._lock:
+            self._install(key, frame, version, report)
+
+        return version
+
+    def export_shared(self, directory: str) -> str:
+        import pyarrow as pa  # type: ignore # pylint: disable=import-outside-toplevel
+
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        with self._lock:
+            for key, frame in self._frames.items():
+                # Uncompressed IPC so readers can map the buffers instead of decoding them. Every export gets
+                # fresh file names: overwriting a file that another process has mapped would corrupt its view.
+                name = f"{hashlib.sha256(repr(key).encode()).hexdigest()[:16]}-{self._versions[key]}.arrow"
+                path = os.path.join(directory, name)
+                if not os.path.exists(path):
+                    table = pa.Table.from_pandas(frame, preserve_index=False)
+                    with pa.OSFile(f"{path}.tmp", "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+                    os.replace(f"{path}.tmp", path)
+                entries.append({"key": list(key), "version": self._versions[key], "file": name})
+
+        manifest_path = os.path.join(directory, "manifest.json")
+        with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as target:
+            json.dump(entries, target)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+        return manifest_path
+
+    def attach_shared(self, directory: str) -> None:
+        import pyarrow as pa  # type: ignore # pylint: disable=import-outside-toplevel
+
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as source:
+            entries = json.load(source)
+
+        for entry in entries:
+            key = tuple(tuple(part) if isinstance(part, list) else part for part in entry["key"])
+            table = pa.ipc.open_file(pa.memory_map(os.path.join(directory, entry["file"]))).read_all()
+            # Arrow-backed columns keep pointing into the shared mapping; categoricals are small enough to copy
+            self._frames[key] = table.to_pandas(
+                types_mapper=lambda type_: None if pa.types.is_dictionary(type_) else pd.ArrowDtype(type_)
+            )
+            self._versions[key] = entry["version"]
+
+    def _attach_from_environment(self) -> None:
+        if self._shared_checked:
+            return
+        self._shared_checked = True
+        directory = os.environ.get(shared_data_env)
+        if directory and os.path.exists(os.path.join(directory, "manifest.json")):
+            self.attach_shared(directory)
+
+    def _get_frame(self, key: tuple) -> Optional[pd.DataFrame]:
+        frame = self._frames.get(key)
+        if frame is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return frame
+
+    def _load(self, key: tuple) -> pd.DataFrame:
+        frame, version, report = self._read(key)
+        self._install(key, frame, version, report)
+
+        return frame
+
+    def _load_partitions(self, key: tuple, store: "PartitionedStore") -> pd.DataFrame:
+        frame, version, report = self._read_partitions(key, store)
+        self._install(key, frame, version, report)
+
+        return frame
+
+    @timed(rows=rows_of_first_result)
+    def _read(self, key: tuple) -> tuple[pd.DataFrame, str, Optional[dict]]:
+        source, sheet_name, header, compact = key
+        datasets = Datasets(source, compact=compact)
+        frame = datasets.read_sheet(sheet_name, header)
+        version = datasets.get_cache_key(sheet_name, header)
+        if compact:
+            return frame, get_dataset_version(version, compact), datasets.memory_reports[sheet_name]
+
+        return frame, version, None
+
+    def _read_partitions(self, key: tuple, store: "PartitionedStore") -> tuple[pd.DataFrame, str, Optional[dict]]:
+        _, _, kind, years, compact = key
+        columns = None
+        if compact:
+            schema = COMPACT_SCHEMAS[kind]
+            available = store.get_columns(kind)
+            trailing = available[-schema["trailing"] :]
+            columns = [column for column in available if column in schema["keep"] or column in trailing]
+
+        frame = store.read(kind, years, columns)
+        version = store.get_version(kind, years)
+        if compact:
+            before = memory_footprint(frame)
+            frame = compact_frame(frame, COMPACT_SCHEMAS[kind])
+            report = {"before_bytes": before, "after_bytes": memory_footprint(frame)}
+            return frame, get_dataset_version(version, compact), report
+
+        return frame, version, None
+
+    def _install(self, key: tuple, frame: pd.DataFrame, version: str, report: Optional[dict]) -> None:
+        self._versions[key] = version
+        if report is not None:
+            self._memory_reports[key] = report
+        self._frames[key] = frame
+
+
+class PartitionedStore:
+
+    def __init__(
+        self,
+        root: str = partitions_dir,
+    ) -> None:
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+
+    def ingest(self, source: str, year: Optional[int] = None, chunksize: Optional[int] = None) -> dict[str, str]:
+        datasets = Datasets(source)
+        year = year or datasets.year
+        manifest = self.read_manifest()
+
+        written = {}
+        for kind, (_, header) in SHEETS.items():
+            sheet_name = get_sheet_name(kind, year)
+            version = datasets.get_cache_key(sheet_name, header)
+            partition = self.get_partition_path(kind, year)
+            entry = manifest.get(kind, {}).get(str(year))
+            if entry is not None and entry["version"] == version and os.path.exists(partition):
+                continue
+
+            tmp_dir = f"{partition}.{os.getpid()}.tmp"
+            if chunksize is None:
+                os.makedirs(tmp_dir, exist_ok=True)
+                df = normalise_mixed_columns(datasets.read_sheet(sheet_name, header))
+                df.to_parquet(os.path.join(tmp_dir, "part-00000.parquet"), index=False)
+            else:
+                from streaming import ingest_sheet  # pylint: disable=import-outside-toplevel
+
+                ingest_sheet(source, sheet_name, header, tmp_dir, chunksize)
+            # The old partition is renamed aside rather than deleted first, so it is only missing between two renames
+            old_dir = f"{partition}.{os.getpid()}.old"
+            if os.path.exists(partition):
+                os.rename(partition, old_dir)
+            os.rename(tmp_dir, partition)
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+            manifest.setdefault(kind, {})[str(year)] = {"version": version, "source": os.path.abspath(source)}
+            written[kind] = partition
+
+        self.write_manifest(manifest)
+
+        return written
+
+    def get_partition_path(self, kind: str, year: int) -> str:
+        return os.path.join(self.root, f"sheet={kind}", f"year={year}")
+
+    def get_years(self, kind: str) -> list[int]:
+        return sorted(int(year) for year in self.read_manifest().get(kind, {}))
+
+    def get_columns(self, kind: str) -> list[str]:
+        import pyarrow.parquet as pq  # type: ignore # pylint: disable=import-outside-toplevel
+
+        years = self.get_years(kind)
+        if not years:
+            raise KeyError(f"No partitions ingested for {kind!r}")
+
+        partition = self.get_partition_path(kind, years[-1])
+
+        return pq.read_schema(os.path.join(partition, sorted(os.listdir(partition))[0])).names
+
+    def get_version(self, kind: str, years: Iterable[int]) -> str:
+        partitions = self.read_manifest().get(kind, {})
+        years = list(years)
+        self._check_years(kind, years, partitions)
+        versions = [f"{year}:{partitions[str(year)]['version']}" for year in years]
+
+        return hashlib.sha256(",".join(versions).encode()).hexdigest()[:16]
+
+    def read(self, kind: str, years: Iterable[int], columns: Optional[list[str]] = None) -> pd.DataFrame:
+        import pyarrow as pa  # type: ignore # pylint: disable=import-outside-toplevel
+
+        from streaming import read_chunked  # pylint: disable=import-outside-toplevel
+
+        years = list(years)
+        self._check_years(kind, years, self.read_manifest().get(kind, {}))
+
+        # Only the requested years' files are opened, and only the requested columns are decoded
+        tables = []
+        for year in years:
+            table = read_chunked(self.get_partition_path(kind, year), columns)
+            tables.append(table.add_column(0, "Year", pa.array([year] * table.num_rows, pa.int16())))
+
+        return pa.concat_tables(unify_schemas(tables), promote_options="permissive").to_pandas()
+
+    def read_manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, encoding="utf-8") as source:
+            return json.load(source)
+
+    def write_manifest(self, manifest: dict) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as target:
+            json.dump(manifest, target, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _check_years(self, kind: str, years: list[int], partitions: dict) -> None:
+        missing = [year for year in years if str(year) not in partitions]
+        if missing or not years:
+            raise KeyError(f"No {kind!r} partitions for years {missing or years} in {self.root}")
+
+
+registry = DatasetRegistry()
+metrics.register_collector("dataset_registry", registry.stats)
+
+
+def get_available_engines(source: str) -> list[str]:
+    suffix = os.path.splitext(source)[1].lower()
+    if suffix not in ENGINES:
+        raise ValueError(f"Unsupported source format {suffix!r}; expected one of {', '.join(ENGINES)}")
+
+    return [engine for engine, module in ENGINES[suffix] if module is None or importlib.util.find_spec(module)]
+
+
+def select_engine(source: str) -> str:
+    engine = os.environ.get(engine_env)
+    if engine:
+        return engine
+    engines = get_available_engines(source)
+    if not engines:
+        modules = sorted({module for _, module in ENGINES[os.path.splitext(source)[1].lower()] if module})
+        raise ImportError(f"No reader installed for {source}; install one of {', '.join(modules)}")
+
+    return engines[0]
+
+
+def read_excel_sheet(
+    source: str, sheet_name: str, header: int, engine: str, usecols: Optional[list[str]] = None
+) -> pd.DataFrame:
+    if engine == "streaming":
+        from streaming import read_sheet  # pylint: disable=import-outside-toplevel
+
+        return read_sheet(source, sheet_name, header, usecols)
+
+    return pd.read_excel(source, sheet_name, header=header, engine=engine, usecols=usecols)
+
+
+def get_sheet_names(source: str) -> list[str]:
+    if source.lower().endswith(".ods"):
+        from streaming import get_ods_sheet_names  # pylint: disable=import-outside-toplevel
+
+        return get_ods_sheet_names(source)
+
+    import openpyxl  # type: ignore # pylint: disable=import-outside-toplevel
+
+    workbook = openpyxl.load_workbook(source, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def get_dataset_version(key: str, compact: bool) -> str:
+    # The version builders expose for a source key; compact frames differ from full ones, so they are told apart
+    return f"{key}-compact" if compact else key
+
+
+def get_sheet_name(kind: str, year: int) -> str:
+    return SHEETS[kind][0].format(year=year)
+
+
+def infer_year(source: str) -> Optional[int]:
+    match = re.search(r"(?<!\d)(?:19|20)\d{2}(?!\d)", os.path.basename(source))
+
+    return int(match.group()) if match else None
+
+
+def normalise_years(years: Union[int, Iterable[int]]) -> tuple[int, ...]:
+    if isinstance(years, int):
+        return (years,)
+
+    return tuple(sorted(set(years)))
+
+
+def _describe_key(key: tuple) -> str:
+    if key[0] == "partitions":
+        return f"{key[2]} {list(key[3])} ({os.path.basename(key[1])})"
+
+    return f"{key[1]} ({os.path.basename(key[0])})"
+
+
+def unify_schemas(tables: list) -> list:
+    import pyarrow as pa  # type: ignore # pylint: disable=import-outside-toplevel
+
+    # Parts disagree on types where a column is empty in one of them (read as double), gappy or mixed
+    unified = list(tables)
+    for name in tables[0].schema.names:
+        types = {table.schema.field(name).type for table in tables if name in table.schema.names}
+        if len(types) < 2:
+            continue
+        typed = {
+            table.schema.field(name).type
+            for table in tables
+            if name in table.schema.names and table[name].null_count < table.num_rows
+        }
+        if len(typed) == 1:
+            target = typed.pop()
+        elif all(pa.types.is_integer(type_) or pa.types.is_floating(type_) for type_ in typed):
+            target = pa.float64()
+        else:
+            target = pa.string()
+        for position, table in enumerate(unified):
+            if name not in table.schema.names:
+                continue
+            column = table[name]
+            if column.null_count == table.num_rows:
+                column = pa.nulls(table.num_rows, target)
+            else:
+                column = column.cast(target)
+            unified[position] = table.set_column(table.schema.get_field_index(name), name, column)
+
+    return unified
+
+
+def get_compact_schema(sheet_name: str) -> dict:
+    for prefix, schema in COMPACT_SCHEMAS.items():
+        if sheet_name.startswith(prefix):
+            return schema
+
+    raise KeyError(f"No compact schema for sheet {sheet_name!r}")
+
+
+def compact_frame(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    trailing = df.columns[-schema["trailing"] :].tolist()
+    keep = ["Year"] + schema["keep"] + trailing
+    columns = [column for column in df.columns if column in keep]
+    df = df[columns].copy()
+
+    for column in schema["category"] + trailing:
+        df[column] = df[column].astype("category")
+    for column, dtype in schema["downcast"].items():
+        df[column] = df[column].astype(dtype)
+
+    return df
+
+
+def memory_footprint(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _hand_out(frame: pd.DataFrame) -> pd.DataFrame:
+    # A shallow copy only keeps callers' edits out of the shared frame under Copy-on-Write; otherwise it is deep
+    return frame.copy(deep=not _copy_on_write())
+
+
+def _copy_on_write() -> bool:
+    # The default from pandas 3; from 1.5 an opt-in left to the application, as it applies to the whole process
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    try:
+        return pd.get_option("mode.copy_on_write") is True
+    except KeyError:
+        return False
+
+
+def _columnar_suffix() -> str:
+    return ".feather" if importlib.util.find_spec("pyarrow") else ".pkl"
+
+
+def normalise_mixed_columns(df: pd.DataFrame) -> pd.DataFrame:
+    # Arrow needs one type per column; identifiers such as URN mix ints and strings in the workbook
+    df = df.copy(deep=False)
+    for column in df.columns[df.dtypes == object]:
+        types = {type(value) for value in df[column].dropna()}
+        if len(types) > 1:
+            df[column] = df[column].map(lambda value: value if pd.isna(value) else str(value))
+
+    return df
+
+
+def _write_columnar(df: pd.DataFrame, path: str, suffix: str) -> None:
+    if suffix == ".pkl":
+        df.to_pickle(path)
+    else:
+        df.to_feather(path)
+
+
+def _read_columnar(path: str) -> pd.DataFrame:
+    if path.endswith(".pkl"):
+        return pd.read_pickle(path)
+
+    from pyarrow import feather  # type: ignore # pylint: disable=import-outside-toplevel
+
+    # Arrow IPC files can be memory-mapped, so repeated loads only touch the pages they use
+    return feather.read_table(path, memory_map=True).to_pandas()
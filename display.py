@@ -1,237 +1,335 @@
+import gzip
+import hmac
+import os
+import sys
+import warnings
+from typing import Iterable, Optional
+
 import dash  # type: ignore
-from dash import dcc, html, Output, Input, dash_table  # type: ignore
+from dash import dcc, html, Output, Input, State, ClientsideFunction, dash_table  # type: ignore
 import dash_bootstrap_components as dbc  # type: ignore
 import plotly.express as px  # type: ignore
+import plotly.graph_objects as go  # type: ignore
+import plotly.io as pio  # type: ignore
 
-# import pandas as pd  # type: ignore
+import pandas as pd  # type: ignore
 
 
-from manipulations import BarChartBuilder, TableBuilder, LAFilter
+from caching import FigureCache
+from datasets import filepath
+from instrumentation import metrics, timed
+from jobs import JobQueue
+from profiling import profiled, profiler
+from snapshots import SnapshotManager
+from manipulations import BarChartBuilder, TableBuilder, LAFilter, empty_distribution, split_distributions
+from rollups import RollupBuilder
 
 bar_chart_builder = BarChartBuilder()
 table_builder = TableBuilder()
 la_filter = LAFilter()
+rollup_builder = RollupBuilder()
+figure_cache = FigureCache()
+metrics.register_collector("figure", figure_cache.stats)
+job_queue = JobQueue()
+snapshot_manager: Optional[SnapshotManager] = None
+_snapshot_layouts: dict[str, dict] = {}
+
+# Compact responses drop the plotly template and round numbers before they go over the wire
+compact_responses: bool = os.environ.get("LIDA_COMPACT_RESPONSES", "") not in ("", "0")
+response_precision: int = 2
+
+# The /_lida/* routes are registered only when LIDA_ADMIN is set, and then require this bearer token if it is set
+admin_env: str = "LIDA_ADMIN"
+admin_token_env: str = "LIDA_ADMIN_TOKEN"
 
 
 # Define functions that do not require callback
-def display_provision_type_table(data):
-    df = table_builder.calculate_provision_types_breakdown(data).to_frame().reset_index()
+def format_provision_type_table(breakdown):
+    df = breakdown.to_frame().reset_index()
     df.columns = ["Provision Type", "Count"]
-    data = df.to_dict("records")
+    data = format_table_records(df)
 
     return data
 
 
-def display_facilities_count(data):
+def format_facilities_count(count):
 
-    return f"Total Number of Facilities: {table_builder.calculate_total_number_of_facilities(data)}"
+    return f"Total Number of Facilities: {count}"
 
 
-def display_provision_places_count(data):
+def format_provision_places_count(count):
 
-    return f"Total Number of Places: {table_builder.calculate_total_number_of_places(data)}"
+    return f"Total Number of Places: {count}"
 
 
-def display_places_by_provision_type_table(data):
-    df = table_builder.calculate_places_by_provision_type(data).to_frame().reset_index()
+def format_places_by_provision_type_table(places):
+    df = places.to_frame().reset_index()
     df.columns = ["Provision Type", "Places"]
-    data = df.to_dict("records")
+    data = format_table_records(df)
 
     return data
 
 
-# Initialize the app
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.SKETCHY])
+def format_table_records(df):
+    if not compact_responses:
+        return df.to_dict("records")
 
-app.layout = dbc.Container(
-    [
-        # Row 1: General title for the app
-        dbc.Row(
-            [
-                dbc.Col(
-                    html.H1("Overview Statistics from the 2022 OFSTED Data", className="text-center"),
-                    width=12,
-                )
-            ]
-        ),
-        html.Hr(),
-        dbc.Row([dbc.Col(html.H2("National Statistics", className="text-center"), width=12)]),
-        html.Div(style={"height": "20px"}),
-        # Row 2: h2 level header
-        dbc.Row(
-            [
-                dbc.Col(html.H3("The United Kingdom at a Glance", className="text-center"), width=6),
-                dbc.Col(html.H3("Social Care Effectiveness", className="text-center"), width=6),
-            ]
-        ),
-        # Row 3: Two columns, each containing a drop-down menu and a graph/figure
-        dbc.Row(
-            [
-                dbc.Col(
-                    [
-                        dbc.Row(
-                            [
-                                dbc.Col(
-                                    dcc.Dropdown(
-                                        id="dropdown-1",
-                                        options=[
-                                            {"label": "Option 1", "value": "1"},
-                                            {"label": "Option 2", "value": "2"},
-                                        ],
-                                    ),
-                                    width=12,
-                                )
-                            ]
-                        ),
-                        dbc.Row([dbc.Col(dcc.Graph(id="graph-1"), width=12)]),
-                    ],
-                    width=6,
-                ),
-                dbc.Col(
-                    [
-                        dbc.Row(
-                            [
-                                dbc.Col(
-                                    dcc.Dropdown(
-                                        id="effectiveness-dropdown",
-                                        options=bar_chart_builder.get_dropdown_options(),
-                                        value=bar_chart_builder.get_dropdown_options()[0]["value"],
-                                    ),
-                                    width=12,
-                                )
-                            ]
+    # Whole-number floats (e.g. summed places) are sent as integers, everything else to a fixed precision
+    return [
+        {column: _round_value(value) for column, value in record.items()} for record in df.to_dict("records")
+    ]
+
+
+def format_table_columns(records: list[dict]) -> dict:
+    # Column-oriented tables repeat each column name once instead of once per row; see assets/clientside.js
+    columns = list(records[0]) if records else []
+
+    return {"columns": columns, "values": [[record[column] for record in records] for column in columns]}
+
+
+def _round_value(value):
+    if isinstance(value, float):
+        value = round(value, response_precision)
+        if value.is_integer():
+            return int(value)
+
+    return value
+
+
+def display_provision_type_table(data):
+
+    return format_provision_type_table(table_builder.calculate_provision_types_breakdown(data))
+
+
+def display_facilities_count(data):
+
+    return format_facilities_count(table_builder.calculate_total_number_of_facilities(data))
+
+
+def display_provision_places_count(data):
+
+    return format_provision_places_count(table_builder.calculate_total_number_of_places(data))
+
+
+def display_places_by_provision_type_table(data):
+
+    return format_places_by_provision_type_table(table_builder.calculate_places_by_provision_type(data))
+
+
+def collect_layout_content(snapshot=None) -> dict:
+    if snapshot is None:
+        national_builder, provider_builder, local_authority_filter = bar_chart_builder, table_builder, la_filter
+        regional_builder = rollup_builder
+    else:
+        national_builder = snapshot.bar_chart_builder
+        provider_builder = snapshot.table_builder
+        local_authority_filter = snapshot.la_filter
+        regional_builder = snapshot.rollup_builder
+
+    # National totals come from the incremental aggregates, so provider changes never recount the whole frame
+    totals = provider_builder.get_national_aggregates()
+
+    return {
+        "effectiveness_options": national_builder.get_dropdown_options(),
+        "facilities_count": format_facilities_count(totals.facilities),
+        "provision_types": format_provision_type_table(totals.provision_types),
+        "places_count": format_provision_places_count(totals.places),
+        "places_by_provision_type": format_places_by_provision_type_table(totals.places_by_provision_type),
+        "la_options": local_authority_filter.get_la_dropdown_options(),
+        "la_effectiveness_options": local_authority_filter.get_la_effectiveness_dropdown_options(),
+        "regional_options": regional_builder.get_dropdown_options(),
+    }
+
+
+def build_layout(content: Optional[dict] = None) -> dbc.Container:
+    if content is None:
+        content = collect_layout_content()
+
+    return dbc.Container(
+        [
+            # Row 1: General title for the app
+            dbc.Row(
+                [
+                    dbc.Col(
+                        html.H1("Overview Statistics from the 2022 OFSTED Data", className="text-center"),
+                        width=12,
+                    )
+                ]
+            ),
+            html.Hr(),
+            dbc.Row([dbc.Col(html.H2("National Statistics", className="text-center"), width=12)]),
+            html.Div(style={"height": "20px"}),
+            # Row 2: h2 level header
+            dbc.Row(
+                [
+                    dbc.Col(html.H3("The United Kingdom at a Glance", className="text-center"), width=6),
+                    dbc.Col(html.H3("Social Care Effectiveness", className="text-center"), width=6),
+                ]
+            ),
+            # Row 3: Two columns, each containing a drop-down menu and a graph/figure
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            dbc.Row(
+                                [
+                                    dbc.Col(
+                                        dcc.Dropdown(
+                                            id="dropdown-1",
+                                            options=content["regional_options"],
+                                            value=content["regional_options"][0]["value"],
+                                        ),
+                                        width=12,
+                                    )
+                                ]
+                            ),
+                            dbc.Row([dbc.Col(dcc.Graph(id="graph-1"), width=12)]),
+                        ],
+                        width=6,
+                    ),
+                    dbc.Col(
+                        [
+                            dbc.Row(
+                                [
+                                    dbc.Col(
+                                        dcc.Dropdown(
+                                            id="effectiveness-dropdown",
+                                            options=content["effectiveness_options"],
+                                            value=content["effectiveness_options"][0]["value"],
+                                        ),
+                                        width=12,
+                                    )
+                                ]
+                            ),
+                            dbc.Row([dbc.Col(dcc.Graph(id="outcome"), width=12)]),
+                        ],
+                        width=6,
+                    ),
+                ]
+            ),
+            # Row 4: Four columns containing tables and markdown
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Markdown(
+                            content["facilities_count"],
+                            id="facilities-count",
+                            style={"fontSize": "24px"},
                         ),
-                        dbc.Row([dbc.Col(dcc.Graph(id="outcome"), width=12)]),
-                    ],
-                    width=6,
-                ),
-            ]
-        ),
-        # Row 4: Four columns containing tables and markdown
-        dbc.Row(
-            [
-                dbc.Col(
-                    dcc.Markdown(
-                        display_facilities_count(table_builder.dataset),
-                        id="facilities-count",
-                        style={"fontSize": "24px"},
+                        width=1,
                     ),
-                    width=1,
-                ),
-                dbc.Col(
-                    dash_table.DataTable(
-                        data=display_provision_type_table(table_builder.dataset),
-                        id="provision-types",
-                        style_cell={
-                            "textAlign": "left",
-                            "maxWidth": "150px",
-                            "whiteSpace": "normal",
-                        },
+                    dbc.Col(
+                        dash_table.DataTable(
+                            data=content["provision_types"],
+                            id="provision-types",
+                            style_cell={
+                                "textAlign": "left",
+                                "maxWidth": "150px",
+                                "whiteSpace": "normal",
+                            },
+                        ),
+                        width=5,
                     ),
-                    width=5,
-                ),
-                dbc.Col(
-                    dcc.Markdown(
-                        display_provision_places_count(table_builder.dataset),
-                        id="places-count",
-                        style={"fontSize": "24px"},
+                    dbc.Col(
+                        dcc.Markdown(
+                            content["places_count"],
+                            id="places-count",
+                            style={"fontSize": "24px"},
+                        ),
+                        width=1,
                     ),
-                    width=1,
-                ),
-                dbc.Col(
-                    dash_table.DataTable(
-                        data=display_places_by_provision_type_table(table_builder.dataset),
-                        id="places-by-provision-type",
-                        style_cell={
-                            "textAlign": "left",
-                            "maxWidth": "150px",
-                            "whiteSpace": "normal",
-                        },
+                    dbc.Col(
+                        dash_table.DataTable(
+                            data=content["places_by_provision_type"],
+                            id="places-by-provision-type",
+                            style_cell={
+                                "textAlign": "left",
+                                "maxWidth": "150px",
+                                "whiteSpace": "normal",
+                            },
+                        ),
+                        width=5,
                     ),
-                    width=5,
-                ),
-            ]
-        ),
-        html.Div(style={"height": "20px"}),
-        html.Hr(),
-        html.Div(style={"height": "50px"}),
-        # Row 5: Another h2 level header
-        dbc.Row([dbc.Col(html.H2("LA-level Statistics", className="text-center"), width=12)]),
-        html.Div(style={"height": "20px"}),
-        dbc.Row(
-            [
-                dbc.Col(
-                    dcc.Dropdown(
-                        id="local-authority",
-                        options=la_filter.get_la_dropdown_options(),
-                        value=la_filter.get_la_dropdown_options()[0]["value"],
+                ]
+            ),
+            html.Div(style={"height": "20px"}),
+            html.Hr(),
+            html.Div(style={"height": "50px"}),
+            # Row 5: Another h2 level header
+            dbc.Row([dbc.Col(html.H2("LA-level Statistics", className="text-center"), width=12)]),
+            html.Div(style={"height": "20px"}),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Dropdown(
+                            id="local-authority",
+                            options=content["la_options"],
+                            value=content["la_options"][0]["value"],
+                        ),
+                        width=3,
+                    )
+                ]
+            ),
+            html.Div(style={"height": "10px"}),
+            # Row 6: Four columns containing tables and markdown
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Markdown(id="la-facilities-count", style={"fontSize": "24px"}),
+                        width=1,
                     ),
-                    width=3,
-                )
-            ]
-        ),
-        html.Div(style={"height": "10px"}),
-        # Row 6: Four columns containing tables and markdown
-        dbc.Row(
-            [
-                dbc.Col(
-                    dcc.Markdown(id="la-facilities-count", style={"fontSize": "24px"}),
-                    width=1,
-                ),
-                dbc.Col(
-                    dash_table.DataTable(
-                        id="la-provision-types",
-                        style_cell={
-                            "textAlign": "left",
-                            "maxWidth": "150px",
-                            "whiteSpace": "normal",
-                        },
+                    dbc.Col(
+                        dash_table.DataTable(
+                            id="la-provision-types",
+                            style_cell={
+                                "textAlign": "left",
+                                "maxWidth": "150px",
+                                "whiteSpace": "normal",
+                            },
+                        ),
+                        width=5,
                     ),
-                    width=5,
-                ),
-                dbc.Col(
-                    dcc.Markdown(id="la-places-count", style={"fontSize": "24px"}),
-                    width=1,
-                ),
-                dbc.Col(
-                    dash_table.DataTable(
-                        id="la-places-by-provision-type",
-                        style_cell={
-                            "textAlign": "left",
-                            "maxWidth": "150px",
-                            "whiteSpace": "normal",
-                        },
+                    dbc.Col(
+                        dcc.Markdown(id="la-places-count", style={"fontSize": "24px"}),
+                        width=1,
                     ),
-                    width=5,
-                ),
-            ]
-        ),
-        html.Div(style={"height": "50px"}),
-        dbc.Row(
-            [
-                dbc.Col(
-                    dcc.Dropdown(
-                        id="la-level-effectiveness-dropdown",
-                        options=la_filter.get_la_effectiveness_dropdown_options(),
-                        value=la_filter.get_la_effectiveness_dropdown_options()[0]["value"],
+                    dbc.Col(
+                        dash_table.DataTable(
+                            id="la-places-by-provision-type",
+                            style_cell={
+                                "textAlign": "left",
+                                "maxWidth": "150px",
+                                "whiteSpace": "normal",
+                            },
+                        ),
+                        width=5,
                     ),
-                    width=6,
-                )
-            ]
-        ),
-        # Row 6: la-level bar charts
-        dbc.Row([dbc.Col(dcc.Graph(id="la-level-effectiveness"), width=12)]),
-    ],
-    fluid=True,
-)
+                ]
+            ),
+            html.Div(style={"height": "50px"}),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dcc.Dropdown(
+                            id="la-level-effectiveness-dropdown",
+                            options=content["la_effectiveness_options"],
+                            value=content["la_effectiveness_options"][0]["value"],
+                        ),
+                        width=6,
+                    )
+                ]
+            ),
+            # Row 6: la-level bar charts
+            dbc.Row([dbc.Col(dcc.Graph(id="la-level-effectiveness"), width=12)]),
+        ],
+        fluid=True,
+    )
 
 
-@app.callback(
-    Output("outcome", "figure"),
-    Input("effectiveness-dropdown", "value"),
-)
-def display_bar_chart(drop_down_option: str):
-    series = bar_chart_builder.supply_bar_chart_info(column=drop_down_option)
+def build_effectiveness_bar_chart(series):
+    if compact_responses:
+        return build_compact_bar_chart(series)
+
     fig = px.bar(
         series,
         color=series.index,
@@ -252,50 +350,475 @@ def display_bar_chart(drop_down_option: str):
     return fig
 
 
-@app.callback(
-    Output("la-facilities-count", "children"),
-    Output("la-provision-types", "data"),
-    Output("la-places-count", "children"),
-    Output("la-places-by-provision-type", "data"),
-    Input("local-authority", "value"),
-)
+def build_regional_bar_chart(breakdown):
+    # One stacked bar per area (the nation first, then each region), one trace per judgement
+    colors = pio.templates[pio.templates.default].layout.colorway
+    areas = [str(area) for area in breakdown.index]
+    traces = [
+        go.Bar(
+            x=areas,
+            y=[_round_value(float(value)) if compact_responses else float(value) for value in breakdown[category]],
+            name=str(category),
+            marker_color=colors[position % len(colors)],
+            hovertemplate=f"{category}<br>%{{x}}: %{{y:.1f}}%<extra></extra>",
+        )
+        for position, category in enumerate(breakdown.columns)
+    ]
+
+    return go.Figure(
+        traces,
+        layout={
+            "template": "none" if compact_responses else pio.templates.default,
+            "barmode": "stack",
+            "yaxis": {"title": {"text": "Percentage (%)"}, "range": [0, 100]},
+            "legend": {"title": {"text": "Categories"}},
+        },
+    )
+
+
+def build_compact_bar_chart(series):
+    # The same bars as px.bar, minus the default template and per-trace metadata that make up most of its JSON
+    colors = px.colors.qualitative.Plotly
+    traces = [
+        go.Bar(
+            x=[str(category)],
+            y=[_round_value(float(value))],
+            name=str(category),
+            marker_color=colors[position % len(colors)],
+        )
+        for position, (category, value) in enumerate(series.items())
+    ]
+
+    return go.Figure(
+        traces,
+        layout={
+            "template": "none",
+            "barmode": "relative",
+            "yaxis": {"title": {"text": "Percentage (%)"}},
+            "xaxis": {"tickvals": [], "ticktext": []},
+            "legend": {"title": {"text": "Categories"}},
+        },
+    )
+
+
+@timed()
+@figure_cache.memoize(version=lambda: (bar_chart_builder.dataset_version, compact_responses))
+@profiled()
+def display_bar_chart(drop_down_option: str):
+    series = bar_chart_builder.supply_bar_chart_info(column=drop_down_option)
+
+    return build_effectiveness_bar_chart(series)
+
+
+@timed()
+@profiled()
 def display_la_level_provision_type_and_places_statistics(local_authority: str):
-    df = la_filter.filter_dataset_by_LA(local_authority=local_authority)
-    facilities_count = display_facilities_count(df)
-    provision_type_table = display_provision_type_table(df)
-    places_count = display_provision_places_count(df)
-    places_by_provision_type = display_places_by_provision_type_table(df)
+    statistics = la_filter.get_la_statistics(local_authority=local_authority)
+    facilities_count = format_facilities_count(statistics.facilities)
+    provision_type_table = format_provision_type_table(statistics.provision_types)
+    places_count = format_provision_places_count(statistics.places)
+    places_by_provision_type = format_places_by_provision_type_table(statistics.places_by_provision_type)
 
     return facilities_count, provision_type_table, places_count, places_by_provision_type
 
 
-@app.callback(
-    Output("la-level-effectiveness", "figure"),
-    Input("local-authority", "value"),
-    Input("la-level-effectiveness-dropdown", "value"),
-)
+@timed()
+@figure_cache.memoize(version=lambda: (rollup_builder.dataset_version, compact_responses))
+@profiled()
+def display_regional_breakdown(drop_down_option: str):
+    breakdown = rollup_builder.supply_regional_breakdown(column=drop_down_option)
+
+    return build_regional_bar_chart(breakdown)
+
+
+@timed()
+@figure_cache.memoize(version=lambda: (la_filter.dataset_version, compact_responses))
+@profiled()
 def display_la_level_effectiveness_barchart(local_authority: str, drop_down_option: str):
     df = la_filter.filter_dataset_by_LA(local_authority=local_authority)
     series = la_filter.supply_la_level_bar_chart_info(data=df, column=drop_down_option)
-    fig = px.bar(
-        series,
-        color=series.index,
-        title="",
+
+    return build_effectiveness_bar_chart(series)
+
+
+def format_distribution(series) -> dict:
+    precision = response_precision if compact_responses else 6
+
+    return {"categories": [str(item) for item in series.index], "percentages": series.round(precision).tolist()}
+
+
+def format_breakdown(breakdown) -> dict:
+    precision = response_precision if compact_responses else 6
+
+    return {
+        "areas": [str(area) for area in breakdown.index],
+        "categories": [str(category) for category in breakdown.columns],
+        "percentages": [breakdown[category].round(precision).tolist() for category in breakdown.columns],
+    }
+
+
+def format_clientside_statistics(statistics) -> list:
+    facilities_count, provision_types, places_count, places_by_provision_type = statistics
+    if not compact_responses:
+        return [facilities_count, provision_types, places_count, places_by_provision_type]
+
+    return [
+        facilities_count,
+        format_table_columns(provision_types),
+        places_count,
+        format_table_columns(places_by_provision_type),
+    ]
+
+
+def collect_clientside_data() -> dict:
+    national_columns = [option["value"] for option in bar_chart_builder.get_dropdown_options()]
+    la_columns = [option["value"] for option in la_filter.get_la_effectiveness_dropdown_options()]
+    national = split_distributions(bar_chart_builder.summarize_effectiveness())
+    by_la = split_distributions(la_filter.summarize_la_effectiveness(), by="Local authority")
+
+    data = {
+        "national": {
+            column: format_distribution(national.get(column, empty_distribution(column))) for column in national_columns
+        },
+        "regional": {
+            option["value"]: format_breakdown(rollup_builder.supply_regional_breakdown(option["value"]))
+            for option in rollup_builder.get_dropdown_options()
+        },
+        "la": {},
+        "empty_statistics": format_clientside_statistics(display_la_level_provision_type_and_places_statistics(None)),
+    }
+    for local_authority in la_filter.get_la_index():
+        data["la"][local_authority] = {
+            "statistics": format_clientside_statistics(
+                display_la_level_provision_type_and_places_statistics(local_authority)
+            ),
+            "effectiveness": {
+                column: format_distribution(by_la.get((local_authority, column), empty_distribution(column)))
+                for column in la_columns
+            },
+        }
+
+    return data
+
+
+def refresh_datasets():
+    # Callbacks keep answering from the current frames while the job runs; see SharedDatasetBuilder.reload
+    if snapshot_manager is not None:
+        return snapshot_manager.refresh()
+
+    return job_queue.submit("refresh_datasets", _refresh_datasets)
+
+
+def _refresh_datasets() -> dict:
+    versions = {}
+    # LAFilter and RollupBuilder first, so the sheets they share with TableBuilder and BarChartBuilder are
+    # re-read once, with their index and cube prepared
+    for builder in (la_filter, rollup_builder, table_builder, bar_chart_builder):
+        source = (builder.sheet_name, builder.header, builder.compact, repr(builder.years))
+        if source not in versions:
+            versions[source] = builder.reload()
+
+    # Warm the figures for the default selections so the first request after a refresh is not a cold one
+    layout_content = collect_layout_content()
+    display_bar_chart(layout_content["effectiveness_options"][0]["value"])
+    display_regional_breakdown(layout_content["regional_options"][0]["value"])
+    display_la_level_effectiveness_barchart(
+        layout_content["la_options"][0]["value"], layout_content["la_effectiveness_options"][0]["value"]
     )
 
-    fig.update_layout(
-        yaxis_title="Percentage (%)",
-        xaxis=dict(
-            tickvals=[],  # Empty list to hide x-axis tick values
-            ticktext=[],  # Empty list to hide x-axis tick labels
-        ),
-        legend=dict(
-            title="Categories",
-        ),
+    return {f"{sheet_name} (h{header})": version for (sheet_name, header, _, _), version in versions.items()}
+
+
+def apply_provider_changes(
+    inserts: Optional[pd.DataFrame] = None,
+    updates: Optional[pd.DataFrame] = None,
+    deletes: Optional[Iterable] = None,
+) -> str:
+    # Corrections and new providers: TableBuilder's totals move by the delta, LAFilter indexes the changed frame
+    version = table_builder.apply_changes(inserts, updates, deletes)
+    la_filter.dataset = table_builder.dataset
+    la_filter.version = version
+    if snapshot_manager is not None and snapshot_manager.current is not None:
+        _snapshot_layouts[snapshot_manager.current.version] = collect_layout_content()
+
+    return version
+
+
+def enable_hot_reload(app: dash.Dash, source: str = filepath, interval: float = 2.0) -> SnapshotManager:
+    global snapshot_manager  # pylint: disable=global-statement
+    if snapshot_manager is not None:
+        snapshot_manager.stop()
+
+    snapshot_manager = SnapshotManager(
+        source, compact=la_filter.compact, queue=job_queue, on_build=_prepare_snapshot, on_swap=_install_snapshot
     )
+    snapshot_manager.load()
+    snapshot_manager.watch(interval)
+    # A layout function is re-evaluated on every page load, so new visitors get the current snapshot's content
+    app.layout = serve_snapshot_layout
 
-    return fig
+    return snapshot_manager
+
+
+def serve_snapshot_layout() -> dbc.Container:
+
+    return build_layout(_snapshot_layouts[snapshot_manager.current.version])
+
+
+def _prepare_snapshot(snapshot) -> None:
+    _snapshot_layouts[snapshot.version] = collect_layout_content(snapshot)
+
+
+def _install_snapshot(snapshot) -> None:
+    global bar_chart_builder, table_builder, la_filter, rollup_builder  # pylint: disable=global-statement
+    bar_chart_builder, table_builder, la_filter = snapshot.bar_chart_builder, snapshot.table_builder, snapshot.la_filter
+    rollup_builder = snapshot.rollup_builder
+
+    # Figure cache keys carry the dataset version, so entries from older snapshots can never be served again
+    figure_cache.retain(lambda key: key[-1][0] == snapshot.version)
+    for version in [version for version in _snapshot_layouts if version != snapshot.version]:
+        del _snapshot_layouts[version]
+
+
+def register_admin_routes(server, token: Optional[str] = None) -> None:
+    from flask import abort, jsonify, request  # type: ignore # pylint: disable=import-outside-toplevel
+
+    token = (token if token is not None else os.environ.get(admin_token_env)) or None
+
+    def authorize():
+        if not request.path.startswith("/_lida/"):
+            return
+        # With a token every caller must present it; without one only the machine itself may call these routes
+        if token is not None:
+            if not hmac.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()):
+                abort(401)
+        elif request.remote_addr not in ("127.0.0.1", "::1"):
+            abort(403)
+
+    def refresh():
+        refresh_datasets()
+
+        return jsonify(job_queue.get_status()), 202
+
+    def profile():
+        # Toggles profiling in the worker that answers; LIDA_PROFILE switches every worker on at start-up
+        if request.method == "POST":
+            try:
+                rate, memory, limit = parse_profile_options(request.get_json(silent=True) or {}, request.args)
+            except (TypeError, ValueError) as error:
+                return jsonify({"error": str(error)}), 400
+            if rate > 0:
+                profiler.enable(rate, memory, limit)
+            else:
+                profiler.disable()
+        elif request.method == "DELETE":
+            profiler.disable()
+
+        return jsonify(profiler.status())
+
+    server.add_url_rule("/_lida/refresh", "lida_refresh", refresh, methods=["POST"])
+    server.add_url_rule("/_lida/jobs", "lida_jobs", lambda: jsonify(job_queue.get_status()))
+    server.add_url_rule("/_lida/profile", "lida_profile", profile, methods=["GET", "POST", "DELETE"])
+    server.before_request(authorize)
+
+
+def parse_profile_options(options: dict, args: dict) -> tuple[float, Optional[bool], Optional[int]]:
+    rate = float(options.get("rate", args.get("rate", 1.0)))
+    if not 0 <= rate <= 1:
+        raise ValueError(f"rate must be between 0 and 1, got {rate}")
+    memory = options.get("memory")
+    if memory is not None and not isinstance(memory, bool):
+        raise TypeError(f"memory must be true or false, got {memory!r}")
+    limit = options.get("limit")
+    if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int) or limit < 1):
+        raise ValueError(f"limit must be a positive integer, got {limit!r}")
+
+    return rate, memory, limit
+
+
+def register_clientside_callbacks(app: dash.Dash) -> None:
+    # Implemented in assets/clientside.js; the browser answers these without a server round trip
+    app.clientside_callback(
+        ClientsideFunction(namespace="lida", function_name="regional_breakdown"),
+        Output("graph-1", "figure"),
+        Input("dropdown-1", "value"),
+        State("dashboard-data", "data"),
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="lida", function_name="national_effectiveness"),
+        Output("outcome", "figure"),
+        Input("effectiveness-dropdown", "value"),
+        State("dashboard-data", "data"),
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="lida", function_name="la_statistics"),
+        Output("la-facilities-count", "children"),
+        Output("la-provision-types", "data"),
+        Output("la-places-count", "children"),
+        Output("la-places-by-provision-type", "data"),
+        Input("local-authority", "value"),
+        State("dashboard-data", "data"),
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="lida", function_name="la_effectiveness"),
+        Output("la-level-effectiveness", "figure"),
+        Input("local-authority", "value"),
+        Input("la-level-effectiveness-dropdown", "value"),
+        State("dashboard-data", "data"),
+    )
+
+
+def register_callbacks(app: dash.Dash, responses=None) -> None:
+    # `responses` may replace this module's callbacks, e.g. with answers precomputed ahead of time
+    handlers = responses if responses is not None else sys.modules[__name__]
+
+    app.callback(
+        Output("graph-1", "figure"),
+        Input("dropdown-1", "value"),
+    )(handlers.display_regional_breakdown)
+
+    app.callback(
+        Output("outcome", "figure"),
+        Input("effectiveness-dropdown", "value"),
+    )(handlers.display_bar_chart)
+
+    app.callback(
+        Output("la-facilities-count", "children"),
+        Output("la-provision-types", "data"),
+        Output("la-places-count", "children"),
+        Output("la-places-by-provision-type", "data"),
+        Input("local-authority", "value"),
+    )(handlers.display_la_level_provision_type_and_places_statistics)
+
+    app.callback(
+        Output("la-level-effectiveness", "figure"),
+        Input("local-authority", "value"),
+        Input("la-level-effectiveness-dropdown", "value"),
+    )(handlers.display_la_level_effectiveness_barchart)
+
+
+def enable_compression(server) -> None:
+    try:
+        from flask_compress import Compress  # type: ignore # pylint: disable=import-outside-toplevel
+    except ImportError:
+        pass
+    else:
+        # Negotiates brotli as well as gzip when the brotli package is installed
+        Compress(server)
+        return
+
+    from flask import request  # type: ignore # pylint: disable=import-outside-toplevel
+
+    @server.after_request
+    def gzip_response(response):
+        if (
+            response.direct_passthrough
+            or response.status_code != 200
+            or "Content-Encoding" in response.headers
+            or "gzip" not in request.headers.get("Accept-Encoding", "")
+        ):
+            return response
+        payload = response.get_data()
+        if len(payload) < 500:
+            return response
+
+        response.set_data(gzip.compress(payload, compresslevel=6))
+        response.headers["Content-Encoding"] = "gzip"
+        response.headers["Content-Length"] = str(len(response.get_data()))
+        response.vary.add("Accept-Encoding")
+
+        return response
+
+
+# Initialize the app; the workbook is only read here, never at import time
+def create_app(
+    precomputed: Optional[str] = None,
+    clientside: Optional[bool] = None,
+    compact: Optional[bool] = None,
+    hot_reload: Optional[bool] = None,
+) -> dash.Dash:
+    global compact_responses  # pylint: disable=global-statement
+    if compact is not None:
+        compact_responses = compact
+
+    app = dash.Dash(__name__, external_stylesheets=[dbc.themes.SKETCHY])
+    if metrics.enabled:
+        metrics.register_endpoint(app.server)
+    if compact_responses:
+        enable_compression(app.server)
+    if os.environ.get(admin_env, "") not in ("", "0"):
+        register_admin_routes(app.server)
+
+    if clientside is None:
+        clientside = os.environ.get("LIDA_CLIENTSIDE", "") not in ("", "0")
+    if clientside:
+        layout = build_layout()
+        layout.children.append(dcc.Store(id="dashboard-data", data=collect_clientside_data()))
+        app.layout = layout
+        register_clientside_callbacks(app)
+
+        return app
+
+    if hot_reload is None:
+        hot_reload = os.environ.get("LIDA_HOT_RELOAD", "") not in ("", "0")
+    if hot_reload:
+        # Precomputed answers would pin the dashboard to one workbook, so they are not combined with hot reload
+        enable_hot_reload(app)
+        register_callbacks(app)
+
+        return app
+
+    responses = load_precomputed_responses(precomputed or os.environ.get("LIDA_PRECOMPUTED"))
+    if responses is not None:
+        app.layout = build_layout(responses.layout_content)
+    else:
+        app.layout = build_layout()
+    register_callbacks(app, responses)
+
+    return app
+
+
+def load_precomputed_responses(path: Optional[str]):
+    if not path:
+        return None
+
+    from precompute import PrecomputedResponses  # pylint: disable=import-outside-toplevel
+
+    if not os.path.exists(path):
+        warnings.warn(f"Precomputed responses not found at {path}; computing responses live")
+        return None
+
+    responses = PrecomputedResponses.load(path)
+    if not responses.is_current(la_filter.compact):
+        warnings.warn(f"Precomputed responses at {path} are out of date; computing responses live")
+        return None
+
+    return responses
+
+
+_app: Optional[dash.Dash] = None
+
+
+def get_app() -> dash.Dash:
+    global _app  # pylint: disable=global-statement
+    if _app is None:
+        _app = create_app()
+
+    return _app
+
+
+# `display.app` and `display.server` (e.g. for gunicorn) build the app on first access
+def __getattr__(name: str):
+    if name == "app":
+        return get_app()
+    if name == "server":
+        return get_app().server
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    app.run_server(debug=True)
+    get_app().run_server(debug=True)
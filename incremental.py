@@ -0,0 +1,206 @@
+import math
+from collections import Counter, defaultdict
+from typing import Iterable, NamedTuple, Optional
+
+import pandas as pd  # type: ignore
+
+from manipulations import TableBuilder
+
+
+class AggregateTotals(NamedTuple):
+    facilities: int
+    provision_types: pd.Series
+    places: int
+    places_by_provision_type: pd.Series
+
+
+class _Totals:
+
+    def __init__(self) -> None:
+        self.facilities = 0
+        self.places = 0.0
+        self.provision_types: Counter = Counter()
+        self.places_by_provision_type: defaultdict = defaultdict(float)
+
+    def add(self, provision_type, places: float, sign: int) -> None:
+        self.facilities += sign
+        self.places += sign * places
+        if provision_type is None:
+            return
+        self.provision_types[provision_type] += sign
+        self.places_by_provision_type[provision_type] += sign * places
+        if self.provision_types[provision_type] == 0:
+            del self.provision_types[provision_type]
+            del self.places_by_provision_type[provision_type]
+
+    def to_aggregates(self) -> AggregateTotals:
+        # Same shapes as TableBuilder: counts sorted by frequency, places sorted by provision type
+        provision_types = pd.Series(dict(self.provision_types.most_common()), dtype="int64", name="count")
+        provision_types.index.name = "Provision type"
+        places_by_provision_type = pd.Series(
+            dict(sorted(self.places_by_provision_type.items())), dtype="float64", name="Places"
+        )
+        places_by_provision_type.index.name = "Provision type"
+
+        return AggregateTotals(
+            facilities=self.facilities,
+            provision_types=provision_types,
+            places=int(round(self.places)),
+            places_by_provision_type=places_by_provision_type,
+        )
+
+
+class IncrementalAggregates:
+
+    def __init__(
+        self,
+        dataset: pd.DataFrame,
+        key: str = "URN",
+    ) -> None:
+        self.key = key
+        self.national = _Totals()
+        self.by_la: dict[str, _Totals] = defaultdict(_Totals)
+        self._rows: dict = {}
+        self.insert(dataset)
+
+    def insert(self, rows: pd.DataFrame) -> None:
+        for key, record in self._iter_records(rows):
+            if key in self._rows:
+                raise KeyError(f"{self.key} {key!r} is already present; use update()")
+            self._apply(record, sign=1)
+            self._rows[key] = record
+
+    def update(self, rows: pd.DataFrame) -> None:
+        for key, record in self._iter_records(rows):
+            if key not in self._rows:
+                raise KeyError(f"{self.key} {key!r} is not present; use insert()")
+            self._apply(self._rows[key], sign=-1)
+            self._apply(record, sign=1)
+            self._rows[key] = record
+
+    def delete(self, keys: Iterable) -> None:
+        for key in keys:
+            record = self._rows.pop(key, None)
+            if record is None:
+                raise KeyError(f"{self.key} {key!r} is not present")
+            self._apply(record, sign=-1)
+
+    def apply(
+        self,
+        inserts: Optional[pd.DataFrame] = None,
+        updates: Optional[pd.DataFrame] = None,
+        deletes: Optional[Iterable] = None,
+    ) -> None:
+        # Every key is checked before anything changes, so a delta that does not fit leaves the totals as they were
+        deletes = list(deletes) if deletes is not None else None
+        self._check_keys(inserts, updates, deletes)
+        if deletes is not None:
+            self.delete(deletes)
+        if updates is not None:
+            self.update(updates)
+        if inserts is not None:
+            self.insert(inserts)
+
+    def get_national_aggregates(self) -> AggregateTotals:
+        return self.national.to_aggregates()
+
+    def get_la_aggregates(self, local_authority: str) -> AggregateTotals:
+        totals = self.by_la.get(local_authority)
+
+        return (totals or _Totals()).to_aggregates()
+
+    def get_local_authorities(self) -> list[str]:
+        return [local_authority for local_authority, totals in self.by_la.items() if totals.facilities]
+
+    def check_consistency(self, dataset: pd.DataFrame) -> list[str]:
+        # Recomputes everything from `dataset` with TableBuilder and lists every disagreement
+        table_builder = TableBuilder(dataset)
+        mismatches = _compare("national", self.get_national_aggregates(), table_builder, dataset)
+
+        by_la = dict(tuple(dataset.groupby("Local authority", observed=True)))
+        for local_authority in set(by_la) | set(self.get_local_authorities()):
+            expected = by_la.get(local_authority, dataset.iloc[:0])
+            actual = self.get_la_aggregates(local_authority)
+            mismatches.extend(_compare(local_authority, actual, table_builder, expected))
+
+        return mismatches
+
+    def _check_keys(
+        self, inserts: Optional[pd.DataFrame], updates: Optional[pd.DataFrame], deletes: Optional[list]
+    ) -> None:
+        deleted = set(deletes or ())
+        for key in deleted:
+            if key not in self._rows:
+                raise KeyError(f"{self.key} {key!r} is not present")
+        for key in updates[self.key] if updates is not None else ():
+            if key not in self._rows or key in deleted:
+                raise KeyError(f"{self.key} {key!r} is not present; use insert()")
+        for key in inserts[self.key] if inserts is not None else ():
+            if key in self._rows and key not in deleted:
+                raise KeyError(f"{self.key} {key!r} is already present; use update()")
+
+    def _iter_records(self, rows: pd.DataFrame):
+        columns = [self.key, "Local authority", "Provision type", "Places"]
+        for key, local_authority, provision_type, places in rows[columns].itertuples(index=False, name=None):
+            yield key, (_clean(local_authority), _clean(provision_type), 0.0 if _clean(places) is None else places)
+
+    def _apply(self, record: tuple, sign: int) -> None:
+        local_authority, provision_type, places = record
+        self.national.add(provision_type, places, sign)
+        if local_authority is not None:
+            self.by_la[local_authority].add(provision_type, places, sign)
+            if not self.by_la[local_authority].facilities:
+                del self.by_la[local_authority]
+
+
+def apply_row_changes(
+    dataset: pd.DataFrame,
+    key: str,
+    inserts: Optional[pd.DataFrame] = None,
+    updates: Optional[pd.DataFrame] = None,
+    deletes: Optional[Iterable] = None,
+) -> pd.DataFrame:
+    # The frame IncrementalAggregates.apply() describes: updated rows keep their place, inserted ones go last
+    frame = dataset
+    if deletes is not None:
+        frame = frame[~frame[key].isin(list(deletes))]
+    if updates is not None:
+        positions = pd.Series(range(len(frame)), index=frame[key].to_numpy())
+        frame = pd.concat([frame[~frame[key].isin(updates[key])], updates.reindex(columns=frame.columns)])
+        frame = frame.iloc[positions.loc[frame[key]].to_numpy().argsort(kind="stable")]
+    if inserts is not None:
+        frame = pd.concat([frame, inserts.reindex(columns=frame.columns)])
+
+    return frame.reset_index(drop=True)
+
+
+def _clean(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NA:
+        return None
+
+    return value
+
+
+def _compare(scope: str, actual: AggregateTotals, table_builder: TableBuilder, dataset: pd.DataFrame) -> list[str]:
+    expected = AggregateTotals(
+        facilities=table_builder.calculate_total_number_of_facilities(dataset),
+        provision_types=table_builder.calculate_provision_types_breakdown(dataset),
+        places=table_builder.calculate_total_number_of_places(dataset),
+        places_by_provision_type=table_builder.calculate_places_by_provision_type(dataset),
+    )
+
+    mismatches = []
+    if actual.facilities != expected.facilities:
+        mismatches.append(f"{scope}: facilities {actual.facilities} != {expected.facilities}")
+    if actual.places != expected.places:
+        mismatches.append(f"{scope}: places {actual.places} != {expected.places}")
+    if actual.provision_types.to_dict() != {k: int(v) for k, v in expected.provision_types.items()}:
+        mismatches.append(f"{scope}: provision type breakdown differs")
+    expected_places = {k: float(v) for k, v in expected.places_by_provision_type.items()}
+    actual_places = actual.places_by_provision_type.to_dict()
+    if set(actual_places) != set(expected_places) or any(
+        not math.isclose(actual_places[k], expected_places[k], abs_tol=1e-6) for k in expected_places
+    ):
+        mismatches.append(f"{scope}: places by provision type differ")
+
+    return mismatches
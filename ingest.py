@@ -0,0 +1,23 @@
+import argparse
+import logging
+import time
+
+from datasets import PartitionedStore, partitions_dir
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest Ofsted releases into the year-partitioned store.")
+    parser.add_argument("sources", nargs="+", help="workbooks to ingest; the year is read from each file name")
+    parser.add_argument("--year", type=int, default=None, help="release year, when it is not in the file name")
+    parser.add_argument("--root", default=partitions_dir, help="partitioned store directory")
+    parser.add_argument(
+        "--chunksize", type=int, default=None, help="stream rows into Parquet parts of this size to bound memory"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    store = PartitionedStore(args.root)
+    for source in args.sources:
+        start = time.perf_counter()
+        written = store.ingest(source, args.year, args.chunksize)
+        status = ", ".join(written) if written else "up to date"
+        print(f"{source}: {status} ({time.perf_counter() - start:.1f}s)")
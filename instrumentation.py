@@ -0,0 +1,231 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Optional
+
+metrics_env: str = "LIDA_METRICS"
+trace_log_env: str = "LIDA_TRACE_LOG"
+
+# Upper bounds, in seconds, of the call duration histogram buckets
+BUCKETS: tuple = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf"))
+
+trace_logger = logging.getLogger("lida.trace")
+
+
+class Metrics:
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        trace_log: Optional[str] = None,
+    ) -> None:
+        self.enabled = enabled
+        self.calls: dict[str, int] = defaultdict(int)
+        self.seconds: dict[str, float] = defaultdict(float)
+        self.max_seconds: dict[str, float] = defaultdict(float)
+        self.buckets: dict[str, list[int]] = defaultdict(lambda: [0] * len(BUCKETS))
+        self.rows_scanned: dict[str, int] = defaultdict(int)
+        self.counters: dict[tuple, float] = defaultdict(float)
+        self.collectors: dict[str, Callable[[], dict]] = {}
+        self._lock = threading.Lock()
+        self.tracing = False
+        if trace_log:
+            self.enable_tracing(trace_log)
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def enable_tracing(self, path: str) -> None:
+        # One JSON object per line, so traces can be tailed or loaded with pd.read_json(lines=True)
+        handler = logging.FileHandler(path, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        trace_logger.addHandler(handler)
+        trace_logger.setLevel(logging.INFO)
+        trace_logger.propagate = False
+        self.tracing = True
+
+    def timed(self, name: Optional[str] = None, rows: Optional[Callable] = None):
+        # `rows(result, *args, **kwargs)` returns how many rows the call scanned
+        def decorator(func):
+            label = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                # A single attribute check is all a disabled timer costs
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                start = time.perf_counter()
+                result = func(*args, **kwargs)
+                elapsed = time.perf_counter() - start
+                scanned = rows(result, *args, **kwargs) if rows is not None else None
+                self.observe(label, elapsed, scanned)
+
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def observe(self, name: str, seconds: float, rows: Optional[int] = None) -> None:
+        with self._lock:
+            self.calls[name] += 1
+            self.seconds[name] += seconds
+            self.max_seconds[name] = max(self.max_seconds[name], seconds)
+            buckets = self.buckets[name]
+            for position, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    buckets[position] += 1
+                    break
+            if rows is not None:
+                self.rows_scanned[name] += rows
+
+        if self.tracing:
+            trace_logger.info(
+                json.dumps(
+                    {"ts": time.time(), "pid": os.getpid(), "name": name, "ms": seconds * 1000, "rows": rows}
+                )
+            )
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def register_collector(self, name: str, collect: Callable[[], dict]) -> None:
+        # Collectors are polled at scrape time, e.g. for cache statistics kept elsewhere
+        self.collectors[name] = collect
+
+    def reset(self) -> None:
+        with self._lock:
+            for values in (self.calls, self.seconds, self.max_seconds, self.buckets, self.rows_scanned, self.counters):
+                values.clear()
+
+    def snapshot(self) -> dict:
+        # The same figures as /metrics, as a dict for benchmarks and logs
+        with self._lock:
+            timers = {
+                name: {
+                    "calls": self.calls[name],
+                    "seconds": self.seconds[name],
+                    "max_seconds": self.max_seconds[name],
+                    "mean_ms": self.seconds[name] / self.calls[name] * 1000,
+                    "rows_scanned": self.rows_scanned.get(name),
+                }
+                for name in self.calls
+            }
+            counters = {_format_labels(name, dict(labels)): value for (name, labels), value in self.counters.items()}
+
+        return {
+            "timers": timers,
+            "counters": counters,
+            "caches": {name: collect() for name, collect in self.collectors.items()},
+        }
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP lida_calls_total Instrumented calls.",
+            "# TYPE lida_calls_total counter",
+        ]
+        with self._lock:
+            names = sorted(self.calls)
+            lines.extend(f'lida_calls_total{{name="{name}"}} {self.calls[name]}' for name in names)
+
+            lines.extend(["# HELP lida_call_seconds Call duration.", "# TYPE lida_call_seconds histogram"])
+            for name in names:
+                cumulative = 0
+                for bound, count in zip(BUCKETS, self.buckets[name]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'lida_call_seconds_bucket{{name="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'lida_call_seconds_sum{{name="{name}"}} {self.seconds[name]:.6f}')
+                lines.append(f'lida_call_seconds_count{{name="{name}"}} {self.calls[name]}')
+
+            lines.extend(["# HELP lida_call_seconds_max Slowest call.", "# TYPE lida_call_seconds_max gauge"])
+            lines.extend(f'lida_call_seconds_max{{name="{name}"}} {self.max_seconds[name]:.6f}' for name in names)
+
+            lines.extend(
+                ["# HELP lida_rows_scanned_total Dataset rows read.", "# TYPE lida_rows_scanned_total counter"]
+            )
+            lines.extend(
+                f'lida_rows_scanned_total{{name="{name}"}} {rows}' for name, rows in sorted(self.rows_scanned.items())
+            )
+
+            counters = sorted(self.counters.items())
+            for name in sorted({name for (name, _), _ in counters}):
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(
+                    f"{_format_labels(name, dict(labels))} {value:g}"
+                    for (counter, labels), value in counters
+                    if counter == name
+                )
+
+        caches = {cache: collect() for cache, collect in sorted(self.collectors.items())}
+        for field, metric, kind in (
+            ("hits", "lida_cache_hits_total", "counter"),
+            ("misses", "lida_cache_misses_total", "counter"),
+            ("evictions", "lida_cache_evictions_total", "counter"),
+            ("size", "lida_cache_entries", "gauge"),
+            ("hit_rate", "lida_cache_hit_ratio", "gauge"),
+        ):
+            # Samples of one metric have to stay together in the exposition format
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.extend(
+                f'{metric}{{cache="{cache}"}} {stats[field]:g}' for cache, stats in caches.items() if field in stats
+            )
+
+        return "\n".join(lines) + "\n"
+
+    def register_endpoint(self, server, path: str = "/metrics") -> None:
+        from flask import Response  # type: ignore # pylint: disable=import-outside-toplevel
+
+        server.add_url_rule(
+            path,
+            "lida_metrics",
+            lambda: Response(self.render_prometheus(), mimetype="text/plain; version=0.0.4"),
+        )
+
+
+def _format_labels(name: str, labels: dict) -> str:
+    if not labels:
+        return name
+
+    return name + "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+
+
+def rows_of_result(result, *args, **kwargs) -> int:  # pylint: disable=unused-argument
+    return len(result)
+
+
+def rows_of_first_result(result, *args, **kwargs) -> int:  # pylint: disable=unused-argument
+    # For loaders returning (frame, version, ...) tuples
+    return len(result[0])
+
+
+def rows_of_dataset(result, self, *args, **kwargs) -> int:  # pylint: disable=unused-argument
+    # Never loads the frame just to count it: a result served from a cache before the frame was loaded scanned nothing
+    rows = self.dataset_rows
+
+    return rows if rows is not None else 0
+
+
+def rows_of_argument(result, self, *args, **kwargs) -> int:  # pylint: disable=unused-argument
+    # The frame handed to TableBuilder/LAFilter methods, whether passed positionally or as `dataset=`/`data=`
+    dataset = args[0] if args else kwargs.get("dataset", kwargs.get("data"))
+
+    return len(dataset)
+
+
+metrics = Metrics(
+    enabled=os.environ.get(metrics_env, "") not in ("", "0") or bool(os.environ.get(trace_log_env)),
+    trace_log=os.environ.get(trace_log_env) or None,
+)
+timed = metrics.timed
@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(NamedTuple):
+    name: str
+    run: int
+    state: str
+    submitted: float
+    started: Optional[float]
+    finished: Optional[float]
+    error: Optional[str]
+
+
+class JobQueue:
+
+    def __init__(
+        self,
+        workers: int = 1,
+    ) -> None:
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: dict[str, Future] = {}
+        self._status: dict[str, JobStatus] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, func: Callable, *args, **kwargs) -> Future:
+        # A job still waiting to start absorbs repeat requests under its name; once it is running, a new
+        # request queues a fresh run so that changes made in the meantime are not missed
+        with self._lock:
+            future = self._pending.get(name)
+            if future is not None and self._status[name].state == "queued":
+                return future
+
+            if self._executor is None:
+                # Threads are only started once there is work, so importing display stays cheap
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="lida-job")
+            previous = self._status.get(name)
+            run = previous.run + 1 if previous is not None else 1
+            self._status[name] = JobStatus(name, run, "queued", time.time(), None, None, None)
+            future = self._executor.submit(self._run, name, run, func, args, kwargs)
+            self._pending[name] = future
+
+        return future
+
+    def get_status(self) -> dict[str, dict]:
+        with self._lock:
+            return {name: status._asdict() for name, status in self._status.items()}
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            future.exception(timeout)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _run(self, name: str, run: int, func: Callable, args: tuple, kwargs: dict):
+        self._update(name, run, state="running", started=time.time())
+        try:
+            result = func(*args, **kwargs)
+        except Exception as error:
+            # Requests keep being served from the previous data, so a failed job is logged rather than raised
+            logger.exception("Background job %r failed", name)
+            self._update(name, run, state="failed", finished=time.time(), error=repr(error))
+            raise
+        self._update(name, run, state="done", finished=time.time())
+
+        return result
+
+    def _update(self, name: str, run: int, **changes) -> None:
+        # Only the latest run of a job is reported; an older run finishing late must not overwrite it
+        with self._lock:
+            if self._status[name].run == run:
+                self._status[name] = self._status[name]._replace(**changes)
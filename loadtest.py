@@ -0,0 +1,437 @@
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Optional
+
+from benchmark import callback_requests
+
+# The callbacks a dashboard fires when it opens, before any dropdown has been touched
+INITIAL_CALLBACKS: tuple = (
+    "display_regional_breakdown",
+    "display_bar_chart",
+    "display_la_level_provision_type_and_places_statistics",
+    "display_la_level_effectiveness_barchart",
+)
+
+# What a user does next, and the callbacks each action fires; weights follow how the page is laid out,
+# with the LA section (two dropdowns) used more than the national one
+ACTIONS: dict = {
+    "local_authority": (
+        0.45,
+        ("display_la_level_provision_type_and_places_statistics", "display_la_level_effectiveness_barchart"),
+    ),
+    "la_column": (0.30, ("display_la_level_effectiveness_barchart",)),
+    "national_column": (0.15, ("display_bar_chart",)),
+    "regional_column": (0.10, ("display_regional_breakdown",)),
+}
+
+
+class DashboardClient:
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = 30.0,
+    ) -> None:
+        parsed = urllib.parse.urlsplit(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 80
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, body: Optional[dict] = None) -> tuple[int, bytes]:
+        # A connection per request, as gunicorn's sync workers close them after every response anyway
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            payload = json.dumps(body).encode() if body is not None else None
+            headers = {"Content-Type": "application/json", "Accept-Encoding": "gzip"} if payload else {}
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def get_layout(self) -> dict:
+        status, content = self.request("GET", "/_dash-layout")
+        if status != 200:
+            raise RuntimeError(f"/_dash-layout failed with HTTP {status}")
+
+        return json.loads(content)
+
+
+def find_options(layout: dict) -> dict[str, list[str]]:
+    # Dropdown values are read from the served layout, so the harness works against any version of the app
+    options = {}
+    stack = [layout]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            props = node.get("props", {})
+            if "id" in props and isinstance(props.get("options"), list):
+                options[props["id"]] = [
+                    option["value"] if isinstance(option, dict) else option for option in props["options"]
+                ]
+            stack.extend(value for value in props.values() if isinstance(value, (dict, list)))
+
+    return options
+
+
+def build_session(options: dict[str, list[str]], steps: int, rng: random.Random) -> list[tuple[str, dict]]:
+    state = {
+        "local_authority": rng.choice(options["local-authority"]),
+        "la_column": options["la-level-effectiveness-dropdown"][0],
+        "national_column": options["effectiveness-dropdown"][0],
+        "regional_column": options["dropdown-1"][0],
+    }
+    choices = {
+        "local_authority": options["local-authority"],
+        "la_column": options["la-level-effectiveness-dropdown"],
+        "national_column": options["effectiveness-dropdown"],
+        "regional_column": options["dropdown-1"],
+    }
+
+    def bodies(names: tuple) -> list[tuple[str, dict]]:
+        requests = callback_requests(**state)
+
+        return [(name, requests[name]) for name in names]
+
+    session = bodies(INITIAL_CALLBACKS)
+    names = list(ACTIONS)
+    weights = [ACTIONS[name][0] for name in names]
+    for _ in range(steps):
+        action = rng.choices(names, weights)[0]
+        state[action] = rng.choice(choices[action])
+        session.extend(bodies(ACTIONS[action][1]))
+
+    return session
+
+
+def percentile(samples: list[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    # Nearest-rank, so a reported percentile is always a latency that was actually observed
+    ordered = sorted(samples)
+
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summarize_latencies(samples: list[float]) -> dict:
+    return {
+        "count": len(samples),
+        "mean_ms": sum(samples) / len(samples) if samples else None,
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "p99_ms": percentile(samples, 99),
+        "max_ms": max(samples) if samples else None,
+    }
+
+
+def get_process_tree(pid: int) -> list[int]:
+    # The server and every process forked from it (the gunicorn workers), found through /proc
+    parents: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as source:
+                ppid = int(source.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        parents.setdefault(ppid, []).append(int(entry))
+
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(parents.get(current, []))
+
+    return tree
+
+
+def get_memory(pid: int) -> Optional[dict]:
+    # RSS counts the shared dataset mapping once per worker; PSS splits it between them
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as source:
+            for line in source:
+                if line.startswith("VmRSS:"):
+                    memory["rss_kb"] = int(line.split()[1])
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as source:
+            for line in source:
+                if line.startswith("Pss:"):
+                    memory["pss_kb"] = int(line.split()[1])
+    except OSError:
+        pass
+
+    return memory or None
+
+
+class MemorySampler:
+
+    def __init__(
+        self,
+        pid: Optional[int],
+        interval: float = 0.5,
+    ) -> None:
+        self.pid = pid
+        self.interval = interval
+        self.peak: dict[int, dict] = {}
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self) -> None:
+        for pid in get_process_tree(self.pid):
+            memory = get_memory(pid)
+            if memory is None:
+                continue
+            peak = self.peak.setdefault(pid, {})
+            for key, value in memory.items():
+                peak[key] = max(peak.get(key, 0), value)
+
+    def start(self) -> None:
+        if self.pid is None or not os.path.isdir("/proc"):
+            return
+        self._stopped.clear()
+        self.peak = {}
+        self._thread = threading.Thread(target=self._poll, name="lida-memory-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> dict:
+        if self._thread is None:
+            return {}
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        workers = {pid: memory for pid, memory in self.peak.items() if pid != self.pid}
+
+        return {
+            "server": self.peak.get(self.pid),
+            "workers": list(workers.values()),
+            "total_rss_kb": sum(memory.get("rss_kb", 0) for memory in self.peak.values()),
+            "total_pss_kb": sum(memory.get("pss_kb", 0) for memory in self.peak.values()),
+        }
+
+    def _poll(self) -> None:
+        self.sample()
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+
+def run_level(
+    client: DashboardClient,
+    options: dict[str, list[str]],
+    concurrency: int,
+    duration: float,
+    steps: int,
+    think_time: float,
+    seed: int,
+) -> dict:
+    latencies: dict[str, list[float]] = {name: [] for name in INITIAL_CALLBACKS}
+    errors: dict[str, int] = {}
+    sessions = [0] * concurrency
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def user(number: int) -> None:
+        # Seeded per simulated user, so every run replays the same sequences of selections
+        rng = random.Random(seed * 1000 + number)
+        while time.perf_counter() < deadline:
+            for name, body in build_session(options, steps, rng):
+                if time.perf_counter() >= deadline:
+                    return
+                start = time.perf_counter()
+                try:
+                    status, _ = client.request("POST", "/_dash-update-component", body)
+                    error = None if status == 200 else f"HTTP {status}"
+                except OSError as failure:
+                    error = type(failure).__name__
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    if error is None:
+                        latencies[name].append(elapsed)
+                    else:
+                        errors[error] = errors.get(error, 0) + 1
+                if think_time:
+                    time.sleep(rng.expovariate(1 / think_time))
+            sessions[number] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(number,), daemon=True) for number in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    overall = [sample for samples in latencies.values() for sample in samples]
+
+    return {
+        "concurrency": concurrency,
+        "duration_s": elapsed,
+        "requests": len(overall),
+        "errors": errors,
+        "sessions": sum(sessions),
+        "throughput_rps": len(overall) / elapsed if elapsed else None,
+        "latency": summarize_latencies(overall),
+        "callbacks": {name: summarize_latencies(samples) for name, samples in latencies.items()},
+    }
+
+
+def start_server(bind: str, workers: int, compact: bool = False, timeout: float = 120.0) -> subprocess.Popen:
+    command = [sys.executable, "serve.py", "--bind", bind, "--workers", str(workers)]
+    if compact:
+        command.append("--compact")
+    # The harness drives /_dash-update-component, so the app must run its callbacks on the server
+    env = dict(os.environ, LIDA_CLIENTSIDE="0")
+    server = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+
+    client = DashboardClient(f"http://{bind}")
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with code {server.returncode}")
+        try:
+            client.get_layout()
+            return server
+        except (OSError, RuntimeError):
+            time.sleep(0.5)
+    stop_server(server)
+
+    raise RuntimeError(f"server did not start within {timeout:.0f}s")
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.terminate()
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+def get_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(
+    concurrency: list[int],
+    duration: float = 20.0,
+    steps: int = 10,
+    think_time: float = 0.0,
+    seed: int = 0,
+    workers: int = 2,
+    compact: bool = False,
+    bind: str = "127.0.0.1:8051",
+    url: Optional[str] = None,
+    warmup: int = 1,
+) -> dict:
+    server = None if url else start_server(bind, workers, compact)
+    client = DashboardClient(url or f"http://{bind}")
+    try:
+        options = find_options(client.get_layout())
+        # Warm-up sessions fill the figure caches, so the first level is not charged for them
+        rng = random.Random(seed)
+        for _ in range(warmup):
+            for _, body in build_session(options, steps, rng):
+                client.request("POST", "/_dash-update-component", body)
+
+        sampler = MemorySampler(server.pid if server is not None else None)
+        levels = []
+        for level in concurrency:
+            sampler.start()
+            result = run_level(client, options, level, duration, steps, think_time, seed)
+            result["memory"] = sampler.stop()
+            levels.append(result)
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    return {
+        "environment": {
+            "revision": get_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {
+            "url": url or f"http://{bind}",
+            "workers": workers if url is None else None,
+            "compact": compact,
+            "duration_s": duration,
+            "steps": steps,
+            "think_time_s": think_time,
+            "seed": seed,
+            "warmup": warmup,
+        },
+        "levels": levels,
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{'users':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'RSS MB':>10}"]
+    for level in report["levels"]:
+        latency = level["latency"]
+        rss = level["memory"].get("total_rss_kb")
+        lines.append(
+            f"{level['concurrency']:>6}{level['throughput_rps'] or 0:>10.1f}{latency['p50_ms'] or 0:>10.1f}"
+            f"{latency['p95_ms'] or 0:>10.1f}{latency['p99_ms'] or 0:>10.1f}{sum(level['errors'].values()):>8}"
+            f"{rss / 1024 if rss else float('nan'):>10.1f}"
+        )
+
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay dashboard sessions against a local server at rising concurrency."
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="simultaneous users")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per concurrency level")
+    parser.add_argument("--steps", type=int, default=10, help="dropdown changes per session")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between requests, in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the replayed selections")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers of the started server")
+    parser.add_argument("--compact", action="store_true", help="start the server with compact frames")
+    parser.add_argument("--bind", default="127.0.0.1:8051", help="host:port for the started server")
+    parser.add_argument("--url", default=None, help="test an already running server instead of starting one")
+    parser.add_argument("--warmup", type=int, default=1, help="sessions replayed before measuring")
+    parser.add_argument("--json", action="store_true", help="emit the report as JSON")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    result = run(
+        args.concurrency,
+        args.duration,
+        args.steps,
+        args.think_time,
+        args.seed,
+        args.workers,
+        args.compact,
+        args.bind,
+        args.url,
+        args.warmup,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as target:
+            json.dump(result, target, indent=2)
+    print(json.dumps(result, indent=2) if args.json else format_report(result))
@@ -1,17 +1,88 @@
-import pandas as pd  # type: ignore
+import uuid
+from typing import Iterable, NamedTuple, Optional, Union
 
-from datasets import Datasets
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
 
-datasets = Datasets()
+from datasets import compact_default, registry
+from instrumentation import rows_of_argument, rows_of_dataset, rows_of_result, timed
+from result_cache import result_cache
 
 
-class BarChartBuilder:
+class SharedDatasetBuilder:
+    sheet_kind: str = "Provider_level"
+    sheet_name: str = "Provider_level_at_31_Mar_2022"
+    header: int = 4
 
     def __init__(
         self,
-        dataset: pd.DataFrame = datasets.extract_data_for_national_effectiveness(),
+        dataset: Optional[pd.DataFrame] = None,
+        compact: bool = compact_default,
+        years: Optional[Union[int, Iterable[int]]] = None,
+        version: Optional[str] = None,
     ) -> None:
-        self.dataset = dataset
+        self._dataset = dataset
+        self.compact = compact
+        self.years = years
+        self.version = version
+        # What prepare_dataset derives from a frame (an index, a cube), keyed by dataset version
+        self._prepared: dict = {}
+
+    @property
+    def dataset(self) -> pd.DataFrame:
+        # Resolved on access so that importing this module never touches the workbook
+        if self._dataset is None and self.years is not None:
+            return registry.get_partitioned(self.sheet_kind, self.years, compact=self.compact)
+        if self._dataset is None:
+            return registry.get(self.sheet_name, self.header, compact=self.compact)
+
+        return self._dataset
+
+    @dataset.setter
+    def dataset(self, dataset: Optional[pd.DataFrame]) -> None:
+        self._dataset = dataset
+        self.version = None
+
+    @property
+    def dataset_version(self) -> str:
+        if self._dataset is None and self.years is not None:
+            return registry.get_partitioned_version(self.sheet_kind, self.years, compact=self.compact)
+        if self._dataset is None:
+            return registry.get_version(self.sheet_name, self.header, compact=self.compact)
+
+        # An explicit frame is identified by the version it was given (e.g. a snapshot's), else by identity
+        return self.version or f"frame-{id(self._dataset):x}"
+
+    @property
+    def dataset_rows(self) -> Optional[int]:
+        if self._dataset is None and self.years is not None:
+            return registry.get_partitioned_row_count(self.sheet_kind, self.years, compact=self.compact)
+        if self._dataset is None:
+            return registry.get_row_count(self.sheet_name, self.header, compact=self.compact)
+
+        return len(self._dataset)
+
+    @property
+    def result_version(self) -> Optional[str]:
+        # Identity-based versions mean nothing to another process, so results over such frames are not shared
+        if self._dataset is not None and self.version is None:
+            return None
+
+        return f"{self.dataset_version}-{'compact' if self.compact else 'full'}"
+
+    def reload(self) -> str:
+        # Re-reads the source into the registry; prepare_dataset runs before the new frame becomes visible
+        if self._dataset is not None:
+            return self.dataset_version
+        if self.years is not None:
+            return registry.reload_partitioned(
+                self.sheet_kind, self.years, compact=self.compact, prepare=self.prepare_dataset
+            )
+
+        return registry.reload(self.sheet_name, self.header, compact=self.compact, prepare=self.prepare_dataset)
+
+    def prepare_dataset(self, dataset: pd.DataFrame, version: str) -> None:
+        pass
 
     def get_dropdown_options(self) -> list[dict]:
         dropdown_list = self.dataset.columns[-4:].tolist()
@@ -19,55 +90,187 @@ class BarChartBuilder:
 
         return dropdown_options
 
+    def _store_prepared(self, version: str, entry) -> None:
+        # Only the newest other version is kept besides this one; the dict is replaced, never mutated in place
+        others = [(key, value) for key, value in self._prepared.items() if key != version][-1:]
+        self._prepared = dict(others + [(version, entry)])
+
+
+class BarChartBuilder(SharedDatasetBuilder):
+    sheet_kind = "LA_level"
+    sheet_name = "LA_level_at_31_Mar_2022"
+    header = 2
+
+    @timed(rows=rows_of_dataset)
+    @result_cache.memoize()
     def supply_bar_chart_info(self, column: str) -> pd.Series:
-        series = self.dataset[column].value_counts(normalize=True) * 100
+        series = _observed_value_counts(self.dataset[column], normalize=True) * 100
 
         return series
 
+    @timed(rows=rows_of_dataset)
+    @result_cache.memoize()
+    def summarize_effectiveness(self) -> pd.DataFrame:
+        columns = [option["value"] for option in self.get_dropdown_options()]
 
-class TableBuilder:
+        return summarize_distributions(self.dataset, columns)
 
-    def __init__(
+
+class TableBuilder(SharedDatasetBuilder):
+
+    def get_aggregates(self):
+        from incremental import IncrementalAggregates  # pylint: disable=import-outside-toplevel
+
+        version = self.dataset_version
+        # Built from the full frame once per version; apply_changes() moves it along from then on
+        aggregates = self._prepared.get(version)
+        if aggregates is None:
+            aggregates = IncrementalAggregates(self.dataset)
+            self._store_prepared(version, aggregates)
+
+        return aggregates
+
+    def get_national_aggregates(self):
+        return self.get_aggregates().get_national_aggregates()
+
+    def get_la_aggregates(self, local_authority: str):
+        return self.get_aggregates().get_la_aggregates(local_authority)
+
+    def apply_changes(
         self,
-        dataset: pd.DataFrame = datasets.extract_data_for_provision_types_and_places(),
-    ) -> None:
-        self.dataset = dataset
+        inserts: Optional[pd.DataFrame] = None,
+        updates: Optional[pd.DataFrame] = None,
+        deletes: Optional[Iterable] = None,
+    ) -> str:
+        # Totals move by the delta alone; the builder then holds the changed frame under a new version, and no
+        # longer follows registry reloads
+        from incremental import apply_row_changes  # pylint: disable=import-outside-toplevel
+
+        deletes = list(deletes) if deletes is not None else None
+        aggregates = self.get_aggregates()
+        frame = apply_row_changes(self.dataset, aggregates.key, inserts, updates, deletes)
+        aggregates.apply(inserts, updates, deletes)
 
+        version = f"{self.dataset_version}+{uuid.uuid4().hex[:8]}"
+        self._dataset, self.version = frame, version
+        self._prepared = {version: aggregates}
+
+        return version
+
+    @timed(rows=rows_of_argument)
     def calculate_total_number_of_facilities(self, dataset: pd.DataFrame) -> int:
         df = dataset
 
         return len(df["Provision type"])
 
+    @timed(rows=rows_of_argument)
     def calculate_provision_types_breakdown(self, dataset: pd.DataFrame):
         df = dataset
-        provision_type_breakdown = df["Provision type"].value_counts()
+        provision_type_breakdown = _observed_value_counts(df["Provision type"])
 
         return provision_type_breakdown
 
+    @timed(rows=rows_of_argument)
     def calculate_total_number_of_places(self, dataset: pd.DataFrame):
         df = dataset
 
         return int(df["Places"].sum())
 
+    @timed(rows=rows_of_argument)
     def calculate_places_by_provision_type(self, dataset: pd.DataFrame):
         df = dataset
-        data = df.groupby("Provision type")["Places"].sum()
+        data = df.groupby("Provision type", observed=True)["Places"].sum()
 
         return data
 
 
-class LAFilter:
-    def __init__(
-        self,
-        dataset: pd.DataFrame = datasets.extract_data_for_provision_types_and_places(),
-    ) -> None:
-        self.dataset = dataset
+class LAStatistics(NamedTuple):
+    rows: np.ndarray
+    facilities: int
+    provision_types: pd.Series
+    places: int
+    places_by_provision_type: pd.Series
+
 
+class LAFilter(SharedDatasetBuilder):
+
+    @timed(rows=rows_of_result)
     def filter_dataset_by_LA(self, local_authority: str):
-        filtered_dataset = self.dataset[self.dataset["Local authority"] == local_authority]
+        frame, index = self.get_indexed_dataset()
+        statistics = index.get(local_authority)
+        if statistics is None:
+            return frame.iloc[:0]
+
+        filtered_dataset = frame.iloc[statistics.rows]
 
         return filtered_dataset
 
+    @timed()
+    @result_cache.memoize()
+    def get_la_statistics(self, local_authority: str) -> LAStatistics:
+        frame, index = self.get_indexed_dataset()
+        statistics = index.get(local_authority)
+        if statistics is None:
+            empty = frame.iloc[:0]
+            statistics = LAStatistics(
+                rows=np.empty(0, dtype=np.intp),
+                facilities=0,
+                provision_types=_observed_value_counts(empty["Provision type"]),
+                places=0,
+                places_by_provision_type=empty.groupby("Provision type", observed=True)["Places"].sum(),
+            )
+
+        return statistics
+
+    def get_la_index(self) -> dict[str, LAStatistics]:
+        return self.get_indexed_dataset()[1]
+
+    def get_indexed_dataset(self) -> tuple[pd.DataFrame, dict[str, LAStatistics]]:
+        # Rebuilt only when the registry hands out a different version of the dataset; the previous version's
+        # one is kept too, so the next can be prepared before it is swapped in (see _store_prepared)
+        version = self.dataset_version
+        entry = self._prepared.get(version)
+        if entry is None:
+            frame = self.dataset
+            if self.dataset_version != version:
+                # The registry swapped datasets between the two reads; index whichever is current now
+                return self.get_indexed_dataset()
+            entry = (frame, self.build_la_index(frame))
+            self._store_prepared(version, entry)
+
+        return entry
+
+    def prepare_dataset(self, dataset: pd.DataFrame, version: str) -> None:
+        self._store_prepared(version, (dataset, self.build_la_index(dataset)))
+
+    @timed(rows=rows_of_argument)
+    def build_la_index(self, dataset: pd.DataFrame) -> dict[str, LAStatistics]:
+        df = dataset
+        by_la = df.groupby("Local authority", sort=False, observed=True)
+        rows_by_la = by_la.indices
+        places_by_la = by_la["Places"].sum()
+        provision_types = by_la["Provision type"].value_counts()
+        provision_types = provision_types[provision_types > 0]
+        places_by_provision_type = df.groupby(["Local authority", "Provision type"], observed=True)["Places"].sum()
+
+        provision_types_by_la = _split_by_first_level(provision_types)
+        places_by_provision_type_by_la = _split_by_first_level(places_by_provision_type)
+
+        index = {}
+        for local_authority, rows in rows_by_la.items():
+            index[local_authority] = LAStatistics(
+                rows=rows,
+                facilities=len(rows),
+                provision_types=provision_types_by_la.get(local_authority, provision_types.iloc[:0].droplevel(0)),
+                places=int(places_by_la[local_authority]),
+                places_by_provision_type=places_by_provision_type_by_la.get(
+                    local_authority, places_by_provision_type.iloc[:0].droplevel(0)
+                ),
+            )
+
+        return index
+
+    @timed(rows=rows_of_dataset)
     def get_la_dropdown_options(self):
         dropdown_list = self.dataset["Local authority"].unique().tolist()
         dropdown_options = [{"label": f"{item}", "value": f"{item}"} for item in dropdown_list]
@@ -81,7 +284,78 @@ class LAFilter:
 
         return dropdown_options
 
+    @timed(rows=rows_of_argument)
     def supply_la_level_bar_chart_info(self, data: pd.DataFrame, column: str):
-        series = data[column].value_counts(normalize=True) * 100
+        series = _observed_value_counts(data[column], normalize=True) * 100
 
         return series
+
+    @timed(rows=rows_of_dataset)
+    @result_cache.memoize()
+    def summarize_la_effectiveness(self) -> pd.DataFrame:
+        columns = [option["value"] for option in self.get_la_effectiveness_dropdown_options()]
+
+        return summarize_distributions(self.dataset, columns, by="Local authority")
+
+
+def summarize_distributions(dataset: pd.DataFrame, columns: list[str], by: Optional[str] = None) -> pd.DataFrame:
+    # One long-form pass over every column (and group) instead of a value_counts call per column per group.
+    # Within each group and column, rows follow value_counts order: by count, then by first occurrence.
+    id_vars = [by] if by is not None else []
+    long = melt_categories(dataset, columns, id_vars)
+
+    summary = long.groupby(id_vars + ["Column", "Category"], sort=False, observed=True).size()
+    summary = add_percentages(summary[summary > 0].rename("Count").reset_index(), id_vars + ["Column"])
+
+    return summary.sort_values(
+        id_vars + ["Column", "Count"], ascending=[True] * (len(id_vars) + 1) + [False], kind="stable"
+    ).reset_index(drop=True)
+
+
+def melt_categories(dataset: pd.DataFrame, columns: list[str], id_vars: list[str]) -> pd.DataFrame:
+    # One row per (id_vars, column, category) cell, with empty cells dropped as value_counts drops them
+    long = dataset[id_vars + columns].melt(
+        id_vars=id_vars or None, value_vars=columns, var_name="Column", value_name="Category"
+    )
+
+    return long[long["Category"].notna()]
+
+
+def add_percentages(summary: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    totals = summary.groupby(keys, sort=False, observed=True)["Count"].transform("sum")
+    summary["Percentage"] = summary["Count"] / totals * 100
+
+    return summary
+
+
+def split_distributions(summary: pd.DataFrame, by: Optional[str] = None) -> dict:
+    # {column: series} or {(group, column): series}, each shaped like supply_bar_chart_info's result
+    keys = [by, "Column"] if by is not None else ["Column"]
+    distributions = {}
+    for key, group in summary.groupby(keys, sort=False, observed=True):
+        column = key[-1]
+        distributions[key if by is not None else column] = pd.Series(
+            group["Percentage"].to_numpy(), index=pd.Index(group["Category"].to_numpy(), name=column), name="proportion"
+        )
+
+    return distributions
+
+
+def empty_distribution(column: str) -> pd.Series:
+    return pd.Series([], index=pd.Index([], dtype=object, name=column), dtype="float64", name="proportion")
+
+
+def _split_by_first_level(series: pd.Series) -> dict[str, pd.Series]:
+    return {key: group.droplevel(0) for key, group in series.groupby(level=0, sort=False, observed=True)}
+
+
+def _observed_value_counts(series: pd.Series, normalize: bool = False) -> pd.Series:
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.value_counts(normalize=normalize)
+
+    # Categorical columns (compact mode) would otherwise report every category, including unseen ones, and break
+    # ties in category order; object columns break them by first occurrence, which fixes the order of the bars
+    counts = series.value_counts(normalize=normalize, sort=False)
+    counts = counts.reindex(pd.CategoricalIndex(series.dropna().unique(), name=counts.index.name))
+
+    return counts.sort_values(ascending=False, kind="stable")
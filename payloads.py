@@ -0,0 +1,80 @@
+import argparse
+import json
+from typing import Optional
+
+from benchmark import callback_requests
+
+
+def measure_app(app, requests: dict) -> dict:
+    client = app.server.test_client()
+
+    def sizes(method: str, path: str, body: Optional[dict] = None) -> dict:
+        plain = client.open(path, method=method, json=body)
+        encoded = client.open(path, method=method, json=body, headers={"Accept-Encoding": "br, gzip"})
+        if plain.status_code != 200:
+            raise RuntimeError(f"{path} failed with HTTP {plain.status_code}")
+
+        return {
+            "bytes": len(plain.get_data()),
+            "wire_bytes": len(encoded.get_data()),
+            "encoding": encoded.headers.get("Content-Encoding", "identity"),
+        }
+
+    report = {"layout": sizes("GET", "/_dash-layout")}
+    for name, body in requests.items():
+        report[name] = sizes("POST", "/_dash-update-component", body)
+
+    return report
+
+
+def measure_payloads(local_authority: Optional[str] = None) -> dict:
+    import display  # pylint: disable=import-outside-toplevel
+
+    la_options = display.la_filter.get_la_dropdown_options()
+    requests = callback_requests(
+        local_authority=local_authority or la_options[0]["value"],
+        national_column=display.bar_chart_builder.get_dropdown_options()[0]["value"],
+        la_column=display.la_filter.get_la_effectiveness_dropdown_options()[0]["value"],
+    )
+
+    report: dict = {}
+    compact_responses = display.compact_responses
+    try:
+        for mode, compact in (("standard", False), ("compact", True)):
+            display.figure_cache.clear()
+            report[mode] = measure_app(display.create_app(clientside=False, compact=compact), requests)
+            # The clientside layout embeds every LA's statistics in one store, so it is measured separately
+            report[mode]["clientside_layout"] = measure_app(
+                display.create_app(clientside=True, compact=compact), {}
+            )["layout"]
+    finally:
+        # create_app(compact=...) switches the whole process, so the caller's setting is put back
+        display.compact_responses = compact_responses
+        display.figure_cache.clear()
+
+    report["reduction"] = {
+        name: report["standard"][name]["wire_bytes"] / report["compact"][name]["wire_bytes"]
+        for name in report["standard"]
+    }
+
+    return report
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{'response':<56}{'standard':>10}{'compact':>10}{'on wire':>10}{'ratio':>8}"]
+    for name, ratio in report["reduction"].items():
+        standard = report["standard"][name]["bytes"]
+        compact = report["compact"][name]
+        lines.append(f"{name:<56}{standard:>10}{compact['bytes']:>10}{compact['wire_bytes']:>10}{ratio:>7.1f}x")
+
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare response sizes with and without compact responses.")
+    parser.add_argument("--local-authority", default=None, help="LA to request; defaults to the first one")
+    parser.add_argument("--json", action="store_true", help="emit the report as JSON")
+    args = parser.parse_args()
+
+    result = measure_payloads(args.local_authority)
+    print(json.dumps(result, indent=2) if args.json else format_report(result))
@@ -0,0 +1,155 @@
+import argparse
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from datasets import Datasets, cache_dir, compact_default, get_dataset_version
+from manipulations import BarChartBuilder, LAFilter, empty_distribution, split_distributions
+
+artifact_path: str = os.path.join(cache_dir, "precomputed.json.gz")
+# Bumped whenever the artifact gains or changes a section, so older artifacts are recomputed rather than misread
+artifact_format: int = 2
+
+
+class PrecomputedResponses:
+
+    def __init__(
+        self,
+        artifact: dict,
+    ) -> None:
+        self.format = artifact.get("format", 1)
+        self.versions = artifact["versions"]
+        self.layout_content = artifact["layout"]
+        self.effectiveness = artifact["effectiveness"]
+        self.regional = artifact.get("regional", {})
+        self.la_statistics = artifact["la_statistics"]
+        self.la_effectiveness = artifact["la_effectiveness"]
+
+    @classmethod
+    def load(cls, path: str = artifact_path) -> "PrecomputedResponses":
+        with gzip.open(path, "rt", encoding="utf-8") as source:
+            return cls(json.load(source))
+
+    def is_current(self, compact: bool = compact_default) -> bool:
+        # Hashing the workbook is cheap; parsing it is what the artifact exists to avoid
+        datasets = Datasets()
+        current = {
+            "national": get_dataset_version(
+                datasets.get_cache_key(BarChartBuilder.sheet_name, BarChartBuilder.header), compact
+            ),
+            "provider": get_dataset_version(datasets.get_cache_key(LAFilter.sheet_name, LAFilter.header), compact),
+        }
+
+        return self.format == artifact_format and current == self.versions
+
+    def display_bar_chart(self, drop_down_option: str):
+
+        return self.effectiveness.get(drop_down_option, _EMPTY_FIGURE)
+
+    def display_regional_breakdown(self, drop_down_option: str):
+
+        return self.regional.get(drop_down_option, _EMPTY_FIGURE)
+
+    def display_la_level_provision_type_and_places_statistics(self, local_authority: str):
+        if local_authority not in self.la_statistics:
+            return self.la_statistics[""]
+
+        return self.la_statistics[local_authority]
+
+    def display_la_level_effectiveness_barchart(self, local_authority: str, drop_down_option: str):
+
+        return self.la_effectiveness.get(local_authority, {}).get(drop_down_option, _EMPTY_FIGURE)
+
+
+_EMPTY_FIGURE: dict = {"data": [], "layout": {}}
+
+
+def _precompute_la_chunk(local_authorities: list[str], distributions: dict) -> tuple[dict, dict]:
+    import display  # pylint: disable=import-outside-toplevel
+
+    la_statistics = {}
+    la_effectiveness = {}
+    for local_authority in local_authorities:
+        la_statistics[local_authority] = list(
+            display.display_la_level_provision_type_and_places_statistics(local_authority)
+        )
+        # The same JSON round trip as FigureCache, so answers match what the live callback returns
+        la_effectiveness[local_authority] = {
+            column: json.loads(display.build_effectiveness_bar_chart(series).to_json())
+            for column, series in distributions[local_authority].items()
+        }
+
+    return la_statistics, la_effectiveness
+
+
+def precompute(workers: Optional[int] = None, chunksize: int = 8) -> dict:
+    import display  # pylint: disable=import-outside-toplevel
+
+    layout_content = display.collect_layout_content()
+    local_authorities = [option["value"] for option in layout_content["la_options"]]
+    la_columns = [option["value"] for option in layout_content["la_effectiveness_options"]]
+
+    artifact = {
+        "format": artifact_format,
+        "versions": {
+            "national": display.bar_chart_builder.dataset_version,
+            "provider": display.la_filter.dataset_version,
+        },
+        "layout": layout_content,
+        "effectiveness": {
+            option["value"]: display.display_bar_chart(option["value"])
+            for option in layout_content["effectiveness_options"]
+        },
+        "regional": {
+            option["value"]: display.display_regional_breakdown(option["value"])
+            for option in layout_content["regional_options"]
+        },
+        "la_statistics": {"": list(display.display_la_level_provision_type_and_places_statistics(""))},
+        "la_effectiveness": {},
+    }
+
+    # Every LA's distributions come from one vectorized pass; workers only build figures from them
+    by_la = split_distributions(display.la_filter.summarize_la_effectiveness(), by="Local authority")
+    distributions = {
+        local_authority: {
+            column: by_la.get((local_authority, column), empty_distribution(column)) for column in la_columns
+        }
+        for local_authority in local_authorities
+    }
+
+    chunks = [local_authorities[i : i + chunksize] for i in range(0, len(local_authorities), chunksize)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for la_statistics, la_effectiveness in executor.map(
+            _precompute_la_chunk, chunks, [{la: distributions[la] for la in chunk} for chunk in chunks]
+        ):
+            artifact["la_statistics"].update(la_statistics)
+            artifact["la_effectiveness"].update(la_effectiveness)
+
+    return artifact
+
+
+def write_artifact(artifact: dict, path: str = artifact_path) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as target:
+        json.dump(artifact, target, separators=(",", ":"), default=str)
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute every dashboard callback response.")
+    parser.add_argument("--output", default=artifact_path, help="where to write the artifact")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size")
+    parser.add_argument("--chunksize", type=int, default=8, help="local authorities per task")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = precompute(workers=args.workers, chunksize=args.chunksize)
+    write_artifact(result, args.output)
+    print(
+        f"Precomputed {len(result['la_statistics']) - 1} local authorities in "
+        f"{time.perf_counter() - start:.1f}s -> {args.output} ({os.path.getsize(args.output) / 1024:.0f} KiB)"
+    )
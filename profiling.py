@@ -0,0 +1,179 @@
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Fraction of calls to profile, e.g. "1" for every call or "0.05"; unset or "0" leaves profiling off
+profile_env: str = "LIDA_PROFILE"
+profile_dir_env: str = "LIDA_PROFILE_DIR"
+profile_memory_env: str = "LIDA_PROFILE_MEMORY"
+
+
+class Profiler:
+
+    def __init__(
+        self,
+        rate: float = 0.0,
+        directory: str = "profiles",
+        memory: bool = True,
+        limit: int = 100,
+        frames: int = 25,
+    ) -> None:
+        self.rate = rate
+        self.directory = directory
+        self.memory = memory
+        # Stops sampling after this many profiles per process, so a forgotten switch cannot fill the disk
+        self.limit = limit
+        self.frames = frames
+        self.written = 0
+        self.skipped = 0
+        self.recent: deque = deque(maxlen=20)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls) -> "Profiler":
+        return cls(
+            rate=float(os.environ.get(profile_env) or 0),
+            directory=os.environ.get(profile_dir_env) or "profiles",
+            memory=os.environ.get(profile_memory_env, "1") not in ("", "0"),
+        )
+
+    def enable(self, rate: float = 1.0, memory: Optional[bool] = None, limit: Optional[int] = None) -> None:
+        self.rate = rate
+        if memory is not None:
+            self.memory = memory
+        if limit is not None:
+            self.limit = limit
+            self.written = 0
+
+    def disable(self) -> None:
+        self.rate = 0.0
+
+    def profiled(self, name: Optional[str] = None):
+        def decorator(func):
+            label = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                # As with timed, a disabled profiler costs a single attribute check
+                if not self.rate:
+                    return func(*args, **kwargs)
+                if self.written >= self.limit or random.random() >= self.rate:
+                    return func(*args, **kwargs)
+                # cProfile and tracemalloc are process-wide, so concurrent calls run unprofiled
+                if not self._lock.acquire(blocking=False):
+                    self.skipped += 1
+                    return func(*args, **kwargs)
+                try:
+                    return self._profile(label, func, args, kwargs)
+                finally:
+                    self._lock.release()
+
+            return wrapper
+
+        return decorator
+
+    def status(self) -> dict:
+        return {
+            "enabled": bool(self.rate),
+            "rate": self.rate,
+            "memory": self.memory,
+            "directory": os.path.abspath(self.directory),
+            "written": self.written,
+            "limit": self.limit,
+            "skipped": self.skipped,
+            "recent": list(self.recent),
+        }
+
+    def _profile(self, label: str, func, args: tuple, kwargs: dict):
+        tracing = self.memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start(self.frames)
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            snapshot, peak = None, None
+            if tracing:
+                # Allocations made during the call that are still alive when it returns, e.g. the figure
+                snapshot = tracemalloc.take_snapshot().filter_traces(
+                    [tracemalloc.Filter(False, tracemalloc.__file__)]
+                )
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            try:
+                self._write(label, args, kwargs, elapsed, profile, snapshot, peak)
+            except OSError:
+                logger.exception("Could not write the profile of %s", label)
+
+    def _write(
+        self,
+        label: str,
+        args: tuple,
+        kwargs: dict,
+        elapsed: float,
+        profile: cProfile.Profile,
+        snapshot: Optional[tracemalloc.Snapshot],
+        peak: Optional[int],
+    ) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        stem = os.path.join(
+            self.directory, f"{label}.{time.strftime('%Y%m%dT%H%M%S')}.{os.getpid()}.{self.written:04d}"
+        )
+
+        # .prof loads into pstats, snakeviz or gprof2dot; the .txt is the call tree sorted by cumulative time
+        profile.dump_stats(f"{stem}.prof")
+        report = io.StringIO()
+        stats = pstats.Stats(profile, stream=report).strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE)
+        stats.print_stats(40)
+        stats.print_callees(15)
+        with open(f"{stem}.txt", "w", encoding="utf-8") as target:
+            target.write(report.getvalue())
+
+        summary = {
+            "name": label,
+            "arguments": [repr(value)[:200] for value in args] + [f"{k}={v!r}"[:200] for k, v in kwargs.items()],
+            "seconds": elapsed,
+            "profile": f"{stem}.prof",
+            "top_functions": [
+                {"function": pstats.func_std_string(function), "calls": calls, "cumulative_seconds": cumulative}
+                for function, (_, calls, _, cumulative, _) in sorted(
+                    stats.stats.items(), key=lambda item: item[1][3], reverse=True
+                )[:10]
+            ],
+        }
+        if snapshot is not None:
+            # tracemalloc.Snapshot.load() reads it back, e.g. to compare two calls with compare_to()
+            snapshot.dump(f"{stem}.tracemalloc")
+            summary["memory"] = {
+                "snapshot": f"{stem}.tracemalloc",
+                "peak_bytes": peak,
+                "retained_bytes": sum(stat.size for stat in snapshot.statistics("filename")),
+                "top_lines": [
+                    {"location": str(stat.traceback[0]), "bytes": stat.size, "blocks": stat.count}
+                    for stat in snapshot.statistics("lineno")[:10]
+                ],
+            }
+        with open(f"{stem}.json", "w", encoding="utf-8") as target:
+            json.dump(summary, target, indent=2)
+
+        self.written += 1
+        self.recent.append({"name": label, "seconds": elapsed, "files": stem})
+        logger.info("Profiled %s in %.1f ms: %s.*", label, elapsed * 1000, stem)
+
+
+profiler = Profiler.from_environment()
+profiled = profiler.profiled
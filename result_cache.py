@@ -0,0 +1,290 @@
+import functools
+import hashlib
+import logging
+import math
+import operator
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+# Cached results are pickles and are unpickled on every hit, so whoever can write to the shared store can run code in
+# every worker. Only point this at a store that nothing but the dashboard's own workers can write to: a private
+# SQLite file or a Redis database behind authentication, never one shared with other services.
+result_cache_env: str = "LIDA_RESULT_CACHE"
+
+
+# Backends implement the subset of the Redis client API the cache needs: get, set(ex=), delete and flushdb.
+# A redis.Redis client can therefore be used as it is; the classes below are local stand-ins for it.
+class MemoryBackend:
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+    ) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+
+        return value
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._entries[key] = (time.time() + ex if ex else None, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._entries.pop(key, None) is not None for key in keys)
+
+    def flushdb(self) -> bool:
+        with self._lock:
+            self._entries.clear()
+
+        return True
+
+    def dbsize(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend:
+
+    def __init__(
+        self,
+        path: str = os.path.join("data", ".cache", "results.sqlite"),
+        maxsize: int = 10_000,
+        evict_every: int = 64,
+        touch_every: int = 256,
+        touch_interval: float = 30.0,
+    ) -> None:
+        self.path = path
+        self.maxsize = maxsize
+        self.evict_every = evict_every
+        # Access times only order evictions, so hits record them in memory and write them out in batches
+        self.touch_every = touch_every
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._writes = 0
+        self._touched: dict[str, float] = {}
+        self._touched_since = time.time()
+        self._touch_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS results "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, accessed REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        # A hit never writes, so readers in every worker proceed in parallel; expired rows go in evict()
+        now = time.time()
+        row = self._connect().execute(
+            "SELECT value FROM results WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        self._touch(key, now)
+
+        return row[0]
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        now = time.time()
+        connection = self._connect()
+        connection.execute(
+            "INSERT OR REPLACE INTO results (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+            (key, sqlite3.Binary(value), now + ex if ex else None, now),
+        )
+        self._writes += 1
+        if self._writes % self.evict_every == 0:
+            self.evict()
+
+        return True
+
+    def delete(self, *keys: str) -> int:
+        connection = self._connect()
+
+        return sum(connection.execute("DELETE FROM results WHERE key = ?", (key,)).rowcount for key in keys)
+
+    def flushdb(self) -> bool:
+        self._connect().execute("DELETE FROM results")
+
+        return True
+
+    def dbsize(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def evict(self) -> None:
+        # Expired entries go first, then the least recently used ones beyond maxsize
+        self.flush_access_times()
+        connection = self._connect()
+        connection.execute("DELETE FROM results WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+        excess = self.dbsize() - self.maxsize
+        if excess > 0:
+            connection.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed LIMIT ?)", (excess,)
+            )
+
+    def flush_access_times(self) -> None:
+        with self._touch_lock:
+            touched, self._touched = self._touched, {}
+            self._touched_since = time.time()
+        if not touched:
+            return
+        connection = self._connect()
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(
+                "UPDATE results SET accessed = MAX(accessed, ?) WHERE key = ?",
+                [(accessed, key) for key, accessed in touched.items()],
+            )
+        finally:
+            connection.execute("COMMIT")
+
+    def _touch(self, key: str, now: float) -> None:
+        with self._touch_lock:
+            self._touched[key] = now
+            due = len(self._touched) >= self.touch_every or now - self._touched_since >= self.touch_interval
+        if due:
+            self.flush_access_times()
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads, and WAL lets worker processes read while one writes
+        connection = getattr(self._local, "connection", None)
+        if connection is None or getattr(self._local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+
+        return connection
+
+
+class ResultCache:
+
+    def __init__(
+        self,
+        backend=None,
+        ttl: Optional[int] = 3600,
+        namespace: str = "lida",
+    ) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @classmethod
+    def from_url(cls, url: Optional[str], **kwargs) -> "ResultCache":
+        # "memory", "sqlite:///path/to/results.sqlite" or "redis://host:port/db"; empty disables caching
+        if not url:
+            return cls(None, **kwargs)
+        if url == "memory":
+            return cls(MemoryBackend(), **kwargs)
+        if url.startswith("sqlite://"):
+            # As in SQLAlchemy URLs: sqlite:///relative/path and sqlite:////absolute/path
+            path = url[len("sqlite:///") :]
+            return cls(SQLiteBackend(path) if path else SQLiteBackend(), **kwargs)
+        if url.startswith(("redis://", "rediss://", "unix://")):
+            import redis  # type: ignore # pylint: disable=import-outside-toplevel
+
+            return cls(redis.Redis.from_url(url), **kwargs)
+
+        raise ValueError(f"Unsupported result cache backend: {url}")
+
+    def configure(self, backend) -> None:
+        self.backend = backend
+
+    def get_key(self, name: str, version: str, args: tuple, kwargs: dict) -> str:
+        arguments = hashlib.sha256(pickle.dumps((args, sorted(kwargs.items())), protocol=4)).hexdigest()[:32]
+
+        return f"{self.namespace}:{name}:{version}:{arguments}"
+
+    def memoize(
+        self, version: Callable[..., Optional[str]] = operator.attrgetter("result_version"), ttl: Optional[float] = None
+    ):
+        # `version(owner)` identifies the data a method reads; None means the result must not be shared
+        def decorator(func):
+            name = func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(owner, *args, **kwargs):
+                if self.backend is None:
+                    return func(owner, *args, **kwargs)
+                data_version = version(owner)
+                if data_version is None:
+                    return func(owner, *args, **kwargs)
+
+                key = self.get_key(name, data_version, args, kwargs)
+                payload = self._get(key)
+                if payload is not None:
+                    self.hits += 1
+                    return pickle.loads(payload)
+
+                self.misses += 1
+                result = func(owner, *args, **kwargs)
+                self._set(key, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), ttl or self.ttl)
+
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def clear(self) -> None:
+        # With a Redis backend this empties the whole database, so give the cache a database of its own
+        if self.backend is not None:
+            self.backend.flushdb()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _get(self, key: str) -> Optional[bytes]:
+        # A failing backend only costs the cache, never the request
+        try:
+            return self.backend.get(key)
+        except Exception:  # pylint: disable=broad-except
+            self.errors += 1
+            logger.exception("Result cache lookup failed")
+            return None
+
+    def _set(self, key: str, payload: bytes, ttl: Optional[float]) -> None:
+        try:
+            # redis-py only accepts whole seconds (or a timedelta) for ex
+            self.backend.set(key, payload, ex=math.ceil(ttl) if ttl else None)
+        except Exception:  # pylint: disable=broad-except
+            self.errors += 1
+            logger.exception("Result cache store failed")
+
+
+result_cache = ResultCache.from_url(os.environ.get(result_cache_env))
+metrics.register_collector("results", result_cache.stats)
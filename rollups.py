@@ -0,0 +1,127 @@
+import pandas as pd  # type: ignore
+
+from instrumentation import rows_of_argument, rows_of_dataset, timed
+from manipulations import SharedDatasetBuilder, add_percentages, empty_distribution, melt_categories
+from result_cache import result_cache
+
+NATION: str = "England"
+
+# Finest level last; each level rolls up into the one before it, and the first into the nation
+HIERARCHY: tuple = ("Ofsted region", "Local authority name")
+
+
+class RollupCube:
+
+    def __init__(
+        self,
+        cube: pd.DataFrame,
+    ) -> None:
+        self.cube = cube
+        # Every drill-down answer is a lookup into these slices; the frame is never scanned per query
+        self._slices = {key: group for key, group in cube.groupby(["Level", "Area", "Column"], sort=False)}
+        levels = ["Nation"] + list(HIERARCHY)
+        parent_levels = dict(zip(levels[1:], levels))
+        self._children = {
+            (parent_levels[level], parent): group["Area"].unique().tolist()
+            for (level, parent), group in cube.groupby(["Level", "Parent"], sort=False)
+        }
+        self._level_breakdowns: dict[tuple, pd.DataFrame] = {}
+
+    def get_breakdown(self, column: str, level: str = "Nation", area: str = NATION) -> pd.Series:
+        # Shaped like BarChartBuilder.supply_bar_chart_info, so the same chart builders apply
+        group = self._slices.get((level, area, column))
+        if group is None:
+            return empty_distribution(column)
+
+        return pd.Series(
+            group["Percentage"].to_numpy(), index=pd.Index(group["Category"].to_numpy(), name=column), name="proportion"
+        )
+
+    def get_level_breakdown(self, column: str, level: str = HIERARCHY[0]) -> pd.DataFrame:
+        # Areas by categories, in percent, with the categories ordered as in the national breakdown
+        key = (column, level)
+        if key not in self._level_breakdowns:
+            rows = self.cube[(self.cube["Level"] == level) & (self.cube["Column"] == column)]
+            breakdown = rows.pivot_table(
+                index="Area", columns="Category", values="Percentage", aggfunc="sum", fill_value=0.0, observed=True
+            )
+            categories = self.get_breakdown(column).index.tolist()
+            categories += [category for category in breakdown.columns if category not in categories]
+            self._level_breakdowns[key] = breakdown.reindex(columns=categories, fill_value=0.0)
+
+        return self._level_breakdowns[key]
+
+    def get_children(self, level: str, area: str) -> list[str]:
+        return self._children.get((level, area), [])
+
+    def get_areas(self, level: str) -> list[str]:
+        return self.cube.loc[self.cube["Level"] == level, "Area"].unique().tolist()
+
+
+class RollupBuilder(SharedDatasetBuilder):
+    sheet_kind = "LA_level"
+    sheet_name = "LA_level_at_31_Mar_2022"
+    header = 2
+
+    def get_rollup(self) -> RollupCube:
+        # Rebuilt only when the registry hands out a different version of the dataset; the previous version's
+        # one is kept too, so the next can be prepared before it is swapped in (see _store_prepared)
+        version = self.dataset_version
+        cube = self._prepared.get(version)
+        if cube is None:
+            cube = self.prepare_dataset(self.dataset, version)
+
+        return cube
+
+    def prepare_dataset(self, dataset: pd.DataFrame, version: str) -> RollupCube:
+        columns = dataset.columns[-4:].tolist()
+        cube = RollupCube(self.build_rollup(dataset, columns))
+        self._store_prepared(version, cube)
+
+        return cube
+
+    @timed(rows=rows_of_argument)
+    def build_rollup(self, dataset: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+        return build_rollup(dataset, columns)
+
+    @timed(rows=rows_of_dataset)
+    @result_cache.memoize()
+    def supply_regional_breakdown(self, column: str) -> pd.DataFrame:
+        cube = self.get_rollup()
+        national = cube.get_breakdown(column).rename(NATION).to_frame().T
+
+        return pd.concat([national, cube.get_level_breakdown(column)]).fillna(0.0)
+
+
+def build_rollup(
+    dataset: pd.DataFrame, columns: list[str], hierarchy: tuple = HIERARCHY, nation: str = NATION
+) -> pd.DataFrame:
+    hierarchy = list(hierarchy)
+    long = melt_categories(dataset, columns, hierarchy)
+
+    # Rows are counted once, at the finest level; every coarser level is summed from the level below it
+    counts = long.groupby(hierarchy + ["Column", "Category"], sort=False, observed=True).size()
+    counts = counts[counts > 0]
+    levels = []
+    for depth in range(len(hierarchy), -1, -1):
+        if depth < len(hierarchy):
+            counts = counts.groupby(level=hierarchy[:depth] + ["Column", "Category"], sort=False).sum()
+        level = counts.rename("Count").reset_index()
+        level.insert(0, "Level", hierarchy[depth - 1] if depth else "Nation")
+        level.insert(1, "Area", level[hierarchy[depth - 1]].astype(object) if depth else nation)
+        if depth >= 2:
+            level.insert(2, "Parent", level[hierarchy[depth - 2]].astype(object))
+        else:
+            level.insert(2, "Parent", nation if depth == 1 else None)
+        levels.append(level[["Level", "Area", "Parent", "Column", "Category", "Count"]])
+
+    cube = pd.concat(levels[::-1], ignore_index=True)
+    cube["Category"] = cube["Category"].astype(object)
+    cube = add_percentages(cube, ["Level", "Area", "Column"])
+
+    # Within each area and column, categories run from most to least common, as value_counts orders them
+    order = cube.groupby(["Level", "Area", "Column"], sort=False).ngroup()
+
+    return cube.assign(_order=order).sort_values(["_order", "Count"], ascending=[True, False], kind="stable").drop(
+        columns="_order"
+    ).reset_index(drop=True)
@@ -0,0 +1,70 @@
+import argparse
+import atexit
+import os
+import shutil
+import tempfile
+
+from datasets import registry, shared_data_env
+
+
+def get_shared_root() -> str:
+    # /dev/shm keeps the Arrow files in RAM; any other directory still works through the page cache
+    return "/dev/shm" if os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()
+
+
+def prepare_shared_datasets(compact: bool = False, directory: str = None) -> str:
+    import display  # pylint: disable=import-outside-toplevel
+
+    for builder in (display.bar_chart_builder, display.table_builder, display.la_filter, display.rollup_builder):
+        builder.compact = compact
+        builder.dataset  # pylint: disable=pointless-statement
+
+    directory = directory or tempfile.mkdtemp(prefix="lida-", dir=get_shared_root())
+    registry.export_shared(directory)
+
+    # Swap the parent's private copies for views of the shared mapping before any worker is forked
+    registry.invalidate()
+    registry.attach_shared(directory)
+    os.environ[shared_data_env] = directory
+
+    return directory
+
+
+def run_gunicorn(bind: str, workers: int) -> None:
+    from gunicorn.app.base import BaseApplication  # type: ignore # pylint: disable=import-outside-toplevel
+
+    import display  # pylint: disable=import-outside-toplevel
+
+    class DashboardApplication(BaseApplication):  # pylint: disable=abstract-method
+
+        def load_config(self):
+            # preload_app builds the app once in the parent, so workers fork with the mapped datasets attached
+            for key, value in {"bind": bind, "workers": workers, "preload_app": True}.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return display.get_app().server
+
+    DashboardApplication().run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the dashboard from several workers sharing one dataset copy.")
+    parser.add_argument("--bind", default="127.0.0.1:8050", help="host:port to listen on")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="gunicorn worker processes")
+    parser.add_argument("--compact", action="store_true", help="serve the compact frames")
+    parser.add_argument("--shared-dir", default=None, help="directory for the shared Arrow files")
+    args = parser.parse_args()
+
+    shared_dir = prepare_shared_datasets(args.compact, args.shared_dir)
+    if args.shared_dir is None:
+        atexit.register(shutil.rmtree, shared_dir, True)
+
+    try:
+        run_gunicorn(args.bind, args.workers)
+    except ImportError:
+        # Without gunicorn there is a single process, which still reads the shared files rather than the workbook
+        import display  # pylint: disable=import-outside-toplevel
+
+        host, port = args.bind.rsplit(":", 1)
+        display.get_app().run(host=host, port=int(port))
@@ -0,0 +1,170 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+from datasets import Datasets, compact_default, filepath
+from jobs import JobQueue
+from manipulations import BarChartBuilder, LAFilter, TableBuilder
+from rollups import RollupBuilder
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot(NamedTuple):
+    version: str
+    created: float
+    source: str
+    bar_chart_builder: BarChartBuilder
+    table_builder: TableBuilder
+    la_filter: LAFilter
+    rollup_builder: RollupBuilder
+
+
+class SnapshotManager:
+
+    def __init__(
+        self,
+        source: str = filepath,
+        compact: bool = compact_default,
+        queue: Optional[JobQueue] = None,
+        on_build: Optional[Callable[[Snapshot], None]] = None,
+        on_swap: Optional[Callable[[Snapshot], None]] = None,
+    ) -> None:
+        self.source = source
+        self.compact = compact
+        self.queue = queue or JobQueue()
+        # on_build runs in the background before the swap (e.g. to warm caches), on_swap right after it
+        self.on_build = on_build
+        self.on_swap = on_swap
+        self.current: Optional[Snapshot] = None
+        self.watcher: Optional[FileWatcher] = None
+
+    def get_version(self) -> str:
+        datasets = Datasets(self.source)
+        digest = hashlib.sha256()
+        for builder in (BarChartBuilder, TableBuilder):
+            digest.update(datasets.get_content_key(builder.sheet_name, builder.header).encode())
+        digest.update(b"compact" if self.compact else b"full")
+
+        return digest.hexdigest()[:16]
+
+    def build(self) -> Snapshot:
+        version = self.get_version()
+        datasets = Datasets(self.source, compact=self.compact)
+        national = datasets.read_sheet(BarChartBuilder.sheet_name, BarChartBuilder.header)
+        provider = datasets.read_sheet(TableBuilder.sheet_name, TableBuilder.header)
+
+        # Builders over explicit frames never consult the registry, so a snapshot cannot change once built
+        snapshot = Snapshot(
+            version=version,
+            created=time.time(),
+            source=os.path.abspath(self.source),
+            bar_chart_builder=BarChartBuilder(national, self.compact, version=version),
+            table_builder=TableBuilder(provider, self.compact, version=version),
+            la_filter=LAFilter(provider, self.compact, version=version),
+            rollup_builder=RollupBuilder(national, self.compact, version=version),
+        )
+        snapshot.la_filter.get_la_index()
+        snapshot.rollup_builder.get_rollup()
+        if self.on_build is not None:
+            self.on_build(snapshot)
+
+        return snapshot
+
+    def load(self) -> Snapshot:
+        # Builds and installs a snapshot on the calling thread, e.g. at start-up
+        return self._swap(self.build())
+
+    def refresh(self):
+        return self.queue.submit("snapshot", self._refresh)
+
+    def watch(self, interval: float = 2.0) -> "FileWatcher":
+        # Only the source is watched; snapshots never read any other workbook dropped next to it
+        directory, name = os.path.split(os.path.abspath(self.source))
+        self.watcher = FileWatcher(directory, lambda changed: self.refresh(), interval, names=(name,))
+        self.watcher.start()
+
+        return self.watcher
+
+    def stop(self) -> None:
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def _refresh(self) -> Optional[str]:
+        if self.current is not None and self.get_version() == self.current.version:
+            return None
+
+        return self._swap(self.build()).version
+
+    def _swap(self, snapshot: Snapshot) -> Snapshot:
+        previous = self.current
+        # A single reference assignment: every reader sees either the old snapshot or the new one
+        self.current = snapshot
+        logger.info(
+            "Dataset snapshot %s -> %s", previous.version if previous is not None else None, snapshot.version
+        )
+        if self.on_swap is not None:
+            self.on_swap(snapshot)
+
+        return snapshot
+
+
+class FileWatcher:
+
+    def __init__(
+        self,
+        directory: str,
+        callback: Callable[[list[str]], None],
+        interval: float = 2.0,
+        suffixes: tuple = (".xlsx", ".ods"),
+        names: Optional[tuple] = None,
+    ) -> None:
+        self.directory = directory
+        self.callback = callback
+        self.interval = interval
+        self.suffixes = suffixes
+        self.names = names
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def scan(self) -> dict[str, tuple[int, int]]:
+        signatures = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if self.names is not None and entry.name not in self.names:
+                    continue
+                if entry.is_file() and entry.name.endswith(self.suffixes) and not entry.name.startswith("~$"):
+                    stat = entry.stat()
+                    signatures[entry.path] = (stat.st_mtime_ns, stat.st_size)
+
+        return signatures
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._poll, name="lida-file-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _poll(self) -> None:
+        # Polling keeps this dependency-free; a change is only reported once the file has stopped changing,
+        # so a workbook that is still being copied into place is never read half-written
+        known = self.scan()
+        previous = known
+        while not self._stopped.wait(self.interval):
+            current = self.scan()
+            if current != known and current == previous:
+                changed = sorted(path for path in set(known) | set(current) if known.get(path) != current.get(path))
+                known = current
+                try:
+                    self.callback(changed)
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("File watcher callback failed")
+            previous = current
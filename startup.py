@@ -0,0 +1,45 @@
+import argparse
+import json
+import time
+
+# Run as `python startup.py` in a fresh interpreter so the import phase is measured cold
+
+
+def measure_startup() -> dict:
+    timings = {}
+
+    start = time.perf_counter()
+    import display  # pylint: disable=import-outside-toplevel
+
+    timings["import"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for builder in (display.bar_chart_builder, display.table_builder, display.la_filter):
+        builder.dataset  # pylint: disable=pointless-statement
+    timings["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    display.get_app()
+    timings["layout"] = time.perf_counter() - start
+
+    timings["total"] = sum(timings.values())
+
+    return timings
+
+
+def format_report(timings: dict) -> str:
+    lines = [f"{'phase':<8}{'seconds':>10}{'share':>8}"]
+    for phase, seconds in timings.items():
+        share = seconds / timings["total"] * 100 if timings["total"] else 0.0
+        lines.append(f"{phase:<8}{seconds:>10.3f}{share:>7.1f}%")
+
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Break down dashboard start-up time by phase.")
+    parser.add_argument("--json", action="store_true", help="emit the timings as JSON")
+    args = parser.parse_args()
+
+    report = measure_startup()
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
@@ -0,0 +1,283 @@
+import argparse
+import datetime
+import glob
+import logging
+import os
+import sys
+import time
+import zipfile
+from typing import Callable, Iterator, NamedTuple, Optional
+from xml.etree import ElementTree
+
+import pandas as pd  # type: ignore
+
+from datasets import normalise_mixed_columns, unify_schemas
+
+logger = logging.getLogger(__name__)
+
+_TABLE = "{urn:oasis:names:tc:opendocument:xmlns:table:1.0}"
+_OFFICE = "{urn:oasis:names:tc:opendocument:xmlns:office:1.0}"
+_TEXT = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+
+
+class IngestStats(NamedTuple):
+    rows: int
+    chunks: int
+    seconds: float
+    rows_per_second: float
+    peak_rss_mb: Optional[float]
+
+
+def iter_xlsx_rows(path: str, sheet_name: str) -> Iterator[tuple]:
+    import openpyxl  # type: ignore # pylint: disable=import-outside-toplevel
+
+    # read_only streams the sheet XML; data_only returns cached formula results, as pandas does
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook[sheet_name].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_ods_rows(path: str, sheet_name: str) -> Iterator[tuple]:
+    with zipfile.ZipFile(path) as archive, archive.open("content.xml") as content:
+        in_sheet = False
+        parents: list = []
+        empty = 0
+        for event, element in ElementTree.iterparse(content, events=("start", "end")):
+            if event == "start":
+                if element.tag == f"{_TABLE}table":
+                    in_sheet = element.get(f"{_TABLE}name") == sheet_name
+                parents.append(element)
+                continue
+
+            parents.pop()
+            if element.tag == f"{_TABLE}table" and in_sheet:
+                return
+            if element.tag not in (f"{_TABLE}table", f"{_TABLE}table-row"):
+                continue
+
+            row, repeat = (), 0
+            if in_sheet and element.tag == f"{_TABLE}table-row":
+                row = _read_ods_row(element)
+                repeat = int(element.get(f"{_TABLE}number-rows-repeated", "1"))
+            # Handled rows and skipped sheets are detached as well as cleared, so nothing builds up under the root
+            element.clear()
+            if parents:
+                parents[-1].remove(element)
+            if not row:
+                # Empty rows still count towards header offsets, but are only emitted once a row with values follows;
+                # the padding that ends a sheet never is, as pd.read_excel drops it too
+                empty += repeat
+                continue
+            for _ in range(empty):
+                yield ()
+            empty = 0
+            for _ in range(repeat):
+                yield row
+
+    raise KeyError(f"Worksheet {sheet_name!r} not found in {path}")
+
+
+def get_ods_sheet_names(path: str) -> list[str]:
+    names = []
+    parents: list = []
+    with zipfile.ZipFile(path) as archive, archive.open("content.xml") as content:
+        for event, element in ElementTree.iterparse(content, events=("start", "end")):
+            if event == "start":
+                if element.tag == f"{_TABLE}table":
+                    names.append(element.get(f"{_TABLE}name"))
+                elif element.tag == f"{_TABLE}table-source":
+                    # A cached copy of a sheet in an externally linked workbook, not a sheet of this one
+                    names.pop()
+                parents.append(element)
+                continue
+
+            parents.pop()
+            element.clear()
+            if parents:
+                parents[-1].remove(element)
+
+    return names
+
+
+def _read_ods_row(element) -> tuple:
+    values: list = []
+    empty = 0
+    for cell in element:
+        if cell.tag not in (f"{_TABLE}table-cell", f"{_TABLE}covered-table-cell"):
+            continue
+        repeat = int(cell.get(f"{_TABLE}number-columns-repeated", "1"))
+        value = _read_ods_cell(cell)
+        if value is None:
+            # Runs of empty cells pad rows out to the sheet width; they are only expanded when a value follows
+            empty += repeat
+            continue
+        values.extend([None] * empty)
+        values.extend([value] * repeat)
+        empty = 0
+
+    return tuple(values)
+
+
+def _read_ods_cell(cell):
+    value_type = cell.get(f"{_OFFICE}value-type")
+    if value_type is None:
+        return None
+    if value_type in ("float", "percentage", "currency"):
+        number = float(cell.get(f"{_OFFICE}value"))
+        return int(number) if number.is_integer() else number
+    if value_type == "date":
+        return datetime.datetime.fromisoformat(cell.get(f"{_OFFICE}date-value"))
+    if value_type == "boolean":
+        return cell.get(f"{_OFFICE}boolean-value") == "true"
+
+    return "\n".join(_read_ods_text(paragraph) for paragraph in cell.iter(f"{_TEXT}p"))
+
+
+def _read_ods_text(element) -> str:
+    # Runs of spaces, tabs and line breaks are stored as elements rather than literal text
+    parts = [element.text or ""]
+    for child in element:
+        if child.tag == f"{_TEXT}s":
+            parts.append(" " * int(child.get(f"{_TEXT}c", "1")))
+        elif child.tag == f"{_TEXT}tab":
+            parts.append("\t")
+        elif child.tag == f"{_TEXT}line-break":
+            parts.append("\n")
+        else:
+            parts.append(_read_ods_text(child))
+        parts.append(child.tail or "")
+
+    return "".join(parts)
+
+
+def iter_sheet_rows(path: str, sheet_name: str) -> Iterator[tuple]:
+    if path.endswith(".ods"):
+        return iter_ods_rows(path, sheet_name)
+
+    return iter_xlsx_rows(path, sheet_name)
+
+
+def stream_sheet(path: str, sheet_name: str, header: int, chunksize: int = 10_000) -> Iterator[pd.DataFrame]:
+    rows = iter_sheet_rows(path, sheet_name)
+
+    # Same offsets as pd.read_excel(header=...): skip `header` rows, then the next row names the columns
+    for _ in range(header):
+        next(rows, None)
+    columns = _name_columns(next(rows, ()))
+
+    chunk: list = []
+    for row in rows:
+        if not any(value is not None for value in row):
+            continue
+        chunk.append(row[: len(columns)] + (None,) * (len(columns) - len(row)))
+        if len(chunk) >= chunksize:
+            yield _to_frame(chunk, columns)
+            chunk = []
+    if chunk:
+        yield _to_frame(chunk, columns)
+
+
+def read_sheet(path: str, sheet_name: str, header: int, usecols: Optional[list[str]] = None) -> pd.DataFrame:
+    # The whole sheet as one frame, typed as pd.read_excel types it
+    frame = next(stream_sheet(path, sheet_name, header, chunksize=sys.maxsize), pd.DataFrame())
+
+    return frame[usecols] if usecols is not None else frame
+
+
+def _name_columns(header_row: tuple) -> list[str]:
+    while header_row and header_row[-1] is None:
+        header_row = header_row[:-1]
+
+    return [str(name) if name is not None else f"Unnamed: {position}" for position, name in enumerate(header_row)]
+
+
+def _to_frame(rows: list, columns: list[str]) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(rows, columns=columns).infer_objects()
+
+    # Integer columns with gaps come back as object; read_excel gives float64, which also keeps chunks uniform
+    for column in df.columns[df.dtypes == object]:
+        values = df[column].dropna()
+        if len(values) and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+
+    return df
+
+
+def ingest_sheet(
+    path: str,
+    sheet_name: str,
+    header: int,
+    output_dir: str,
+    chunksize: int = 10_000,
+    progress: Optional[Callable[[int, float], None]] = None,
+) -> IngestStats:
+    os.makedirs(output_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(output_dir, "part-*.parquet")):
+        os.remove(stale)
+
+    start = time.perf_counter()
+    rows = 0
+    chunks = 0
+    for chunk in stream_sheet(path, sheet_name, header, chunksize):
+        chunk_path = os.path.join(output_dir, f"part-{chunks:05d}.parquet")
+        normalise_mixed_columns(chunk).to_parquet(chunk_path, index=False)
+        rows += len(chunk)
+        chunks += 1
+        elapsed = time.perf_counter() - start
+        if progress is not None:
+            progress(rows, elapsed)
+        logger.info("%s: %d rows in %.1fs (%.0f rows/s)", sheet_name, rows, elapsed, rows / elapsed)
+
+    seconds = time.perf_counter() - start
+
+    return IngestStats(
+        rows=rows,
+        chunks=chunks,
+        seconds=seconds,
+        rows_per_second=rows / seconds if seconds else 0.0,
+        peak_rss_mb=get_peak_rss_mb(),
+    )
+
+
+def get_peak_rss_mb() -> Optional[float]:
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Kilobytes on Linux, bytes on macOS
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def read_chunked(directory: str, columns: Optional[list[str]] = None):
+    import pyarrow as pa  # type: ignore # pylint: disable=import-outside-toplevel
+    import pyarrow.parquet as pq  # type: ignore # pylint: disable=import-outside-toplevel
+
+    parts = sorted(glob.glob(os.path.join(directory, "part-*.parquet")))
+    if not parts:
+        raise FileNotFoundError(f"No chunked output in {directory}")
+    tables = [pq.read_table(part, columns=columns) for part in parts]
+
+    return pa.concat_tables(unify_schemas(tables), promote_options="permissive")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a worksheet into chunked Parquet with bounded memory.")
+    parser.add_argument("source", help="an .xlsx or .ods workbook")
+    parser.add_argument("sheet", help="worksheet name")
+    parser.add_argument("output", help="directory for part-*.parquet files")
+    parser.add_argument("--header", type=int, default=0, help="rows before the header row, as in pd.read_excel")
+    parser.add_argument("--chunksize", type=int, default=10_000, help="rows per chunk")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    stats = ingest_sheet(args.source, args.sheet, args.header, args.output, args.chunksize)
+    peak_rss = f"{stats.peak_rss_mb:.0f} MB" if stats.peak_rss_mb is not None else "unknown"
+    print(
+        f"{stats.rows} rows in {stats.chunks} chunks, {stats.seconds:.1f}s "
+        f"({stats.rows_per_second:.0f} rows/s, peak RSS {peak_rss})"
+    )
@@ -0,0 +1,260 @@
+import argparse
+import os
+from typing import Optional
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from manipulations import BarChartBuilder, TableBuilder
+
+REGIONS: list[str] = [
+    "London",
+    "North West",
+    "South East",
+    "South West",
+    "Yorkshire and The Humber",
+    "West Midlands",
+    "North East",
+    "East of England",
+    "East Midlands",
+]
+
+PROVISION_TYPES: dict[str, float] = {
+    "Children's home": 0.78,
+    "Independent Fostering Agency": 0.09,
+    "Residential Special School": 0.035,
+    "Residential Family Centre": 0.02,
+    "Residential special school (registered as a children's home)": 0.017,
+    "Boarding School": 0.017,
+    "Adoption Support Agency": 0.011,
+    "Further Education College with Residential Accommodation": 0.01,
+    "Voluntary Adoption Agency": 0.01,
+    "Residential Holiday Scheme for Disabled Children": 0.005,
+    "Secure children's home": 0.005,
+}
+
+# Agencies are registered without places, as in the published workbook
+PROVISION_TYPES_WITHOUT_PLACES: set[str] = {
+    "Independent Fostering Agency",
+    "Adoption Support Agency",
+    "Voluntary Adoption Agency",
+}
+
+JUDGEMENTS: dict[Optional[str], float] = {
+    "Good": 0.59,
+    "Requires improvement to be good": 0.17,
+    "Outstanding": 0.14,
+    "Inadequate": 0.025,
+    None: 0.075,
+}
+
+SECTORS: dict[str, float] = {
+    "Private": 0.75,
+    "Local Authority": 0.14,
+    "Voluntary": 0.1,
+    "Academy": 0.008,
+    "Health Authority": 0.002,
+}
+
+PROVIDER_COLUMNS: list[str] = [
+    "Web link",
+    "URN",
+    "Linked Education URN",
+    "Provision type",
+    "Registration date",
+    "Registration status",
+    "Name",
+    "Address 1",
+    "Address 2",
+    "Town",
+    "County",
+    "Postcode",
+    "Ofsted region",
+    "Government Office Region",
+    "Local authority",
+    "Parliamentary constituency",
+    "Sector",
+    "Places",
+    "Short-break-only children's home",
+    "Organisation which owns the provider",
+    "Latest full inspection event type",
+    "Latest full inspection date",
+    "Latest full inspection publication date",
+    "Latest full inspection event number",
+    "Latest full inspection overall experiences and progress of children and young people",
+    "Latest full inspection outcomes in education and related learning activities",
+    "Latest full inspectio health services",
+    "Latest full inspection how well children and young people are helped and protected",
+    "Latest full inspection the effectiveness of leaders and managers",
+]
+
+LA_COLUMNS: list[str] = [
+    "Web link",
+    "Local authority name",
+    "Ofsted region",
+    "Inspection date",
+    "Overall effectiveness",
+    "Impact of leaders",
+    "Experiences and progress of children who need help and protection",
+    "Experiences and progress of children in care and care leavers",
+]
+
+
+class SyntheticOfstedGenerator:
+
+    def __init__(
+        self,
+        providers: int = 3576,
+        local_authorities: int = 152,
+        skew: float = 1.0,
+        seed: int = 0,
+    ) -> None:
+        self.providers = providers
+        self.local_authorities = local_authorities
+        self.skew = skew
+        self.seed = seed
+
+    def get_la_names(self) -> list[str]:
+        width = len(str(self.local_authorities))
+
+        return [f"Local authority {number:0{width}d}" for number in range(1, self.local_authorities + 1)]
+
+    def get_la_weights(self) -> np.ndarray:
+        # Zipf-like: skew=0 spreads providers evenly, larger values pile them onto the first authorities
+        weights = 1.0 / np.arange(1, self.local_authorities + 1) ** self.skew
+
+        return weights / weights.sum()
+
+    def get_la_regions(self) -> np.ndarray:
+        return np.array(REGIONS)[np.arange(self.local_authorities) % len(REGIONS)]
+
+    def la_level(self) -> pd.DataFrame:
+        rng = np.random.default_rng(self.seed)
+        n = self.local_authorities
+
+        df = pd.DataFrame(
+            {
+                "Web link": "Ofsted Local Authority Webpage",
+                "Local authority name": self.get_la_names(),
+                "Ofsted region": self.get_la_regions(),
+                "Inspection date": _random_dates(rng, n, "2017-01-01", "2022-03-31"),
+            }
+        )
+        for column in LA_COLUMNS[4:]:
+            df[column] = _choose(rng, JUDGEMENTS, n, allow_missing=column != "Overall effectiveness")
+
+        return df[LA_COLUMNS]
+
+    def provider_level(self) -> pd.DataFrame:
+        rng = np.random.default_rng(self.seed + 1)
+        n = self.providers
+
+        la_positions = rng.choice(self.local_authorities, size=n, p=self.get_la_weights())
+        local_authorities = np.array(self.get_la_names(), dtype=object)[la_positions]
+        regions = self.get_la_regions()[la_positions]
+        provision_types = _choose(rng, PROVISION_TYPES, n)
+        places = rng.geometric(0.2, size=n).astype("float64")
+        places[np.isin(provision_types, list(PROVISION_TYPES_WITHOUT_PLACES))] = np.nan
+        inspected = rng.random(n) > 0.075
+        inspection_dates = _random_dates(rng, n, "2017-01-01", "2022-03-31")
+        urns = np.char.add("SC", (np.arange(n) + 100000).astype(str)).astype(object)
+
+        df = pd.DataFrame(
+            {
+                "Web link": "Ofsted Social Care Provider Webpage",
+                "URN": urns,
+                "Linked Education URN": np.where(rng.random(n) < 0.05, rng.integers(100000, 999999, n), np.nan),
+                "Provision type": provision_types,
+                "Registration date": _random_dates(rng, n, "1990-01-01", "2022-03-31"),
+                "Registration status": np.where(rng.random(n) < 0.998, "Active", "Suspended"),
+                "Name": np.char.add("Provider ", np.arange(n).astype(str)).astype(object),
+                "Address 1": np.char.add((np.arange(n) % 200 + 1).astype(str), " High Street").astype(object),
+                "Address 2": None,
+                "Town": np.char.add("Town ", (la_positions + 1).astype(str)).astype(object),
+                "County": None,
+                "Postcode": None,
+                "Ofsted region": regions,
+                "Government Office Region": regions,
+                "Local authority": local_authorities,
+                "Parliamentary constituency": None,
+                "Sector": _choose(rng, SECTORS, n),
+                "Places": places,
+                "Short-break-only children's home": np.where(
+                    rng.random(n) < 0.045, "Short-break-only children's home", None
+                ),
+                "Organisation which owns the provider": None,
+                "Latest full inspection event type": np.where(inspected, "Full inspection", None),
+                "Latest full inspection date": inspection_dates.where(inspected),
+                "Latest full inspection publication date": (inspection_dates + pd.Timedelta(days=30)).where(inspected),
+                "Latest full inspection event number": np.where(inspected, np.arange(n) + 10000000.0, np.nan),
+            }
+        )
+        for column in PROVIDER_COLUMNS[-5:]:
+            judgements = _choose(rng, JUDGEMENTS, n)
+            if column in PROVIDER_COLUMNS[-4:-2]:
+                # Education and health judgements only apply to a handful of providers
+                judgements[rng.random(n) > 0.004] = None
+            judgements[~inspected] = None
+            df[column] = judgements
+
+        return df[PROVIDER_COLUMNS]
+
+    def write_excel(self, path: str) -> None:
+        with pd.ExcelWriter(path, engine="openpyxl") as writer:
+            for sheet_name, header, df in self._sheets():
+                # Keep the same header offsets as the published workbook so Datasets reads it unchanged
+                title = pd.DataFrame({df.columns[0]: [f"Synthetic {sheet_name}"]})
+                title.to_excel(writer, sheet_name=sheet_name, index=False, header=False)
+                df.to_excel(writer, sheet_name=sheet_name, index=False, startrow=header)
+
+    def write_columnar(self, directory: str, file_format: str = "parquet") -> list[str]:
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for sheet_name, _, df in self._sheets():
+            path = os.path.join(directory, f"{sheet_name}.{file_format}")
+            if file_format == "parquet":
+                df.to_parquet(path, index=False)
+            elif file_format == "feather":
+                df.to_feather(path)
+            else:
+                raise ValueError(f"Unsupported columnar format: {file_format}")
+            paths.append(path)
+
+        return paths
+
+    def _sheets(self):
+        yield BarChartBuilder.sheet_name, BarChartBuilder.header, self.la_level()
+        yield TableBuilder.sheet_name, TableBuilder.header, self.provider_level()
+
+
+def _choose(rng: np.random.Generator, weights: dict, size: int, allow_missing: bool = True) -> np.ndarray:
+    choices = [choice for choice in weights if allow_missing or choice is not None]
+    probabilities = np.array([weights[choice] for choice in choices])
+
+    return rng.choice(np.array(choices, dtype=object), size=size, p=probabilities / probabilities.sum())
+
+
+def _random_dates(rng: np.random.Generator, size: int, start: str, end: str) -> pd.Series:
+    start_day = pd.Timestamp(start).value // 86_400_000_000_000
+    end_day = pd.Timestamp(end).value // 86_400_000_000_000
+    days = rng.integers(start_day, end_day, size=size)
+
+    return pd.Series(pd.to_datetime(days, unit="D"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate Ofsted-shaped provider and LA level data.")
+    parser.add_argument("output", help="an .xlsx file, or a directory for columnar output")
+    parser.add_argument("--providers", type=int, default=3576, help="provider-level rows")
+    parser.add_argument("--local-authorities", type=int, default=152, help="number of local authorities")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of providers per LA")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["xlsx", "parquet", "feather"], default=None)
+    args = parser.parse_args()
+
+    generator = SyntheticOfstedGenerator(args.providers, args.local_authorities, args.skew, args.seed)
+    output_format = args.format or ("xlsx" if args.output.endswith(".xlsx") else "parquet")
+    if output_format == "xlsx":
+        generator.write_excel(args.output)
+    else:
+        generator.write_columnar(args.output, output_format)
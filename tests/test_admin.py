@@ -0,0 +1,48 @@
+import flask  # type: ignore
+import pytest  # type: ignore
+
+import display
+from profiling import profiler
+
+
+@pytest.fixture
+def client():
+    server = flask.Flask(__name__)
+    display.register_admin_routes(server, token="secret")
+    state = (profiler.rate, profiler.memory, profiler.limit, profiler.written)
+    yield server.test_client()
+    profiler.rate, profiler.memory, profiler.limit, profiler.written = state
+
+
+@pytest.mark.parametrize(
+    "options", [{"rate": 1, "limit": "5"}, {"rate": "often"}, {"rate": 2}, {"rate": 1, "memory": "no"}]
+)
+def test_bad_profile_options_are_rejected(client, options):
+    response = client.post("/_lida/profile", json=options, headers={"Authorization": "Bearer secret"})
+
+    assert response.status_code == 400
+    assert not profiler.rate
+
+
+def test_profile_options_are_applied(client):
+    response = client.post(
+        "/_lida/profile", json={"rate": "0.5", "limit": 5, "memory": False}, headers={"Authorization": "Bearer secret"}
+    )
+
+    assert response.status_code == 200
+    assert (profiler.rate, profiler.limit, profiler.memory) == (0.5, 5, False)
+
+
+def test_admin_routes_require_the_token(client):
+    assert client.get("/_lida/jobs").status_code == 401
+    assert client.get("/_lida/jobs", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/_lida/jobs", headers={"Authorization": "Bearer secret"}).status_code == 200
+
+
+def test_admin_routes_without_a_token_only_answer_locally():
+    server = flask.Flask(__name__)
+    display.register_admin_routes(server, token="")
+    client = server.test_client()
+
+    assert client.get("/_lida/jobs").status_code == 200
+    assert client.get("/_lida/jobs", environ_overrides={"REMOTE_ADDR": "10.0.0.1"}).status_code == 403
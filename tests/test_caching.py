@@ -0,0 +1,42 @@
+import plotly.graph_objects as go  # type: ignore
+
+from caching import FigureCache
+
+
+def figure(title: str) -> go.Figure:
+    return go.Figure(layout={"title": {"text": title}})
+
+
+def test_least_recently_used_figures_are_evicted():
+    cache = FigureCache(maxsize=2)
+    cache.set("a", figure("a"))
+    cache.set("b", figure("b"))
+    assert cache.get("a")["layout"]["title"]["text"] == "a"
+
+    cache.set("c", figure("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_retain_drops_figures_of_other_versions():
+    cache = FigureCache()
+    state = {"version": "v1"}
+    built = []
+
+    @cache.memoize(version=lambda: state["version"])
+    def chart(column: str):
+        built.append((column, state["version"]))
+        return figure(column)
+
+    for column in ("x", "y", "x"):
+        chart(column)
+    state["version"] = "v2"
+    chart("x")
+
+    assert built == [("x", "v1"), ("y", "v1"), ("x", "v2")]
+    assert cache.retain(lambda key: key[-1] == "v2") == 2
+    assert cache.stats()["size"] == 1
+    chart("x")
+    assert len(built) == 3
@@ -0,0 +1,119 @@
+import multiprocessing
+import os
+import shutil
+
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+
+import datasets
+from synthetic import SyntheticOfstedGenerator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKBOOK = os.path.join(ROOT, datasets.filepath)
+SHEET = ("LA_level_at_31_Mar_2022", 2)
+
+
+def _read_cold(cache_dir: str, start, results) -> None:
+    reader = datasets.Datasets(WORKBOOK)
+    reader.cache_dir = cache_dir
+    start.wait()
+    try:
+        results.put(len(reader.read_sheet(*SHEET)))
+    except Exception as error:  # pylint: disable=broad-except
+        results.put(repr(error))
+
+
+def test_concurrent_cold_start_shares_the_cache(tmp_path):
+    cache_dir = str(tmp_path)
+    # A stale entry for an older version of the sheet, which every process will try to sweep
+    stem = os.path.splitext(os.path.basename(WORKBOOK))[0]
+    stale = os.path.join(cache_dir, f"{stem}.{SHEET[0]}.h{SHEET[1]}.0000000000000000.feather")
+    pd.DataFrame({"a": [1]}).to_feather(stale)
+
+    context = multiprocessing.get_context("spawn")
+    start = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=_read_cold, args=(cache_dir, start, results)) for _ in range(8)]
+    for process in processes:
+        process.start()
+    start.set()
+    outcomes = [results.get(timeout=120) for _ in processes]
+    for process in processes:
+        process.join()
+
+    assert outcomes == [152] * len(processes)
+    assert not os.path.exists(stale)
+    assert [name for name in os.listdir(cache_dir) if name.endswith(".tmp")] == []
+
+
+def test_sheet_names_without_a_year_in_the_file_name(tmp_path):
+    source = str(tmp_path / "workbook.xlsx")
+    shutil.copyfile(WORKBOOK, source)
+    reader = datasets.Datasets(source, use_cache=False)
+
+    assert reader.year is None
+    assert reader.get_sheet_name("LA_level") == "LA_level_at_31_Mar_2022"
+    assert len(reader.extract_data_for_national_effectiveness()) == 152
+    assert datasets.Datasets(source, year=2021).get_sheet_name("LA_level") == "LA_level_at_31_Mar_2021"
+
+    ods = str(tmp_path / "workbook.ods")
+    shutil.copyfile(os.path.splitext(WORKBOOK)[0] + ".ods", ods)
+    assert datasets.Datasets(ods).get_sheet_name("Provider_level") == "Provider_level_at_31_Mar_2022"
+
+
+def test_sheet_name_that_cannot_be_resolved(tmp_path):
+    source = str(tmp_path / "workbook.xlsx")
+    pd.DataFrame({"a": [1]}).to_excel(source, sheet_name="Other", index=False)
+
+    with pytest.raises(ValueError, match="pass year="):
+        datasets.Datasets(source).get_sheet_name("LA_level")
+
+
+def test_registry_frames_are_not_changed_through_hand_outs():
+    registry = datasets.DatasetRegistry()
+    frame = registry.get(*SHEET, source=WORKBOOK)
+    column = frame.columns[-1]
+    original = frame[column].copy()
+
+    frame.loc[:, column] = "changed"
+    frame.iloc[0, 0] = "changed"
+
+    again = registry.get(*SHEET, source=WORKBOOK)
+    pd.testing.assert_series_equal(again[column], original)
+    assert again.iloc[0, 0] != "changed"
+
+
+def test_partitions_for_missing_years_are_not_dropped(tmp_path):
+    source = str(tmp_path / "workbook.xlsx")
+    SyntheticOfstedGenerator(providers=100, local_authorities=10).write_excel(source)
+    store = datasets.PartitionedStore(str(tmp_path / "partitions"))
+    store.ingest(source, year=2022)
+
+    assert len(store.read("LA_level", [2022])) == 10
+    with pytest.raises(KeyError, match="2021"):
+        store.read("LA_level", [2021, 2022])
+    with pytest.raises(KeyError, match="2021"):
+        store.get_version("LA_level", [2021, 2022])
+
+
+def test_reingesting_keeps_the_partition_in_place_until_the_new_one_is_ready(tmp_path, monkeypatch):
+    source = str(tmp_path / "workbook.xlsx")
+    SyntheticOfstedGenerator(providers=100, local_authorities=10).write_excel(source)
+    store = datasets.PartitionedStore(str(tmp_path / "partitions"))
+    store.ingest(source, year=2022)
+
+    SyntheticOfstedGenerator(providers=100, local_authorities=12).write_excel(source)
+    partition = store.get_partition_path("LA_level", 2022)
+    rmtree = shutil.rmtree
+
+    def remove(path, *args, **kwargs):
+        # Old data is only ever removed once it has been renamed aside and the new partition is in place
+        assert os.path.abspath(path) != os.path.abspath(partition)
+        assert os.path.exists(os.path.join(partition, "part-00000.parquet"))
+        rmtree(path, *args, **kwargs)
+
+    monkeypatch.setattr(datasets.shutil, "rmtree", remove)
+    store.ingest(source, year=2022)
+
+    assert len(store.read("LA_level", [2022])) == 12
+    assert os.listdir(os.path.dirname(partition)) == ["year=2022"]
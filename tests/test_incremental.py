@@ -0,0 +1,84 @@
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+
+import display
+from incremental import IncrementalAggregates, apply_row_changes
+from manipulations import TableBuilder
+
+
+@pytest.fixture
+def provider():
+    return TableBuilder(compact=False).dataset
+
+
+def get_changes(dataset: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, list]:
+    inserts = dataset.iloc[:3].copy()
+    inserts["URN"] = ["NEW1", "NEW2", "NEW3"]
+    inserts["Local authority"] = ["Newshire", inserts["Local authority"].iloc[1], None]
+    updates = dataset.iloc[10:14].copy()
+    updates["Places"] = [0.0, 99.0, None, 5.0]
+    # An unchanged row, a move to another LA, a row losing its LA and provision type, and a move to a new LA
+    updates["Provision type"] = [
+        updates["Provision type"].iloc[0], "Children's home", None, "Residential family centre"
+    ]
+    updates["Local authority"] = [
+        updates["Local authority"].iloc[0], dataset["Local authority"].iloc[-1], None, "Newshire"
+    ]
+    deletes = dataset["URN"].iloc[20:30].tolist()
+
+    return inserts, updates, deletes
+
+
+def test_changes_keep_the_aggregates_consistent(provider):
+    aggregates = IncrementalAggregates(provider)
+    assert aggregates.check_consistency(provider) == []
+
+    inserts, updates, deletes = get_changes(provider)
+    aggregates.apply(inserts, updates, deletes)
+    changed = apply_row_changes(provider, "URN", inserts, updates, deletes)
+
+    assert len(changed) == len(provider) + 3 - 10
+    assert aggregates.check_consistency(changed) == []
+    assert aggregates.get_la_aggregates("Newshire").facilities == 2
+
+
+def test_a_delta_that_does_not_fit_changes_nothing(provider):
+    aggregates = IncrementalAggregates(provider)
+    before = aggregates.get_national_aggregates()
+
+    with pytest.raises(KeyError):
+        aggregates.apply(inserts=provider.iloc[:1], deletes=provider["URN"].iloc[1:2])
+
+    assert aggregates.get_national_aggregates().facilities == before.facilities
+    assert aggregates.check_consistency(provider) == []
+
+
+def test_table_builder_serves_totals_from_the_delta(provider):
+    builder = TableBuilder(provider, version="base")
+    totals = builder.get_national_aggregates()
+    assert totals.facilities == builder.calculate_total_number_of_facilities(provider)
+    assert totals.places == builder.calculate_total_number_of_places(provider)
+    pd.testing.assert_series_equal(
+        totals.provision_types, builder.calculate_provision_types_breakdown(provider), check_index_type=False
+    )
+
+    version = builder.apply_changes(*get_changes(provider))
+
+    assert builder.dataset_version == version != "base"
+    assert builder.get_aggregates().check_consistency(builder.dataset) == []
+
+
+def test_display_layout_totals_follow_provider_changes(provider, monkeypatch):
+    monkeypatch.setattr(display, "table_builder", TableBuilder(provider, version="base"))
+    monkeypatch.setattr(display, "la_filter", display.LAFilter(provider, version="base"))
+    before = display.collect_layout_content()
+    assert before["facilities_count"] == display.display_facilities_count(provider)
+    assert before["places_by_provision_type"] == display.display_places_by_provision_type_table(provider)
+
+    display.apply_provider_changes(*get_changes(provider))
+    after = display.collect_layout_content()
+
+    assert after["facilities_count"] == display.display_facilities_count(display.table_builder.dataset)
+    assert after["provision_types"] == display.display_provision_type_table(display.table_builder.dataset)
+    assert after["places_count"] == display.display_provision_places_count(display.table_builder.dataset)
+    assert {"label": "Newshire", "value": "Newshire"} in after["la_options"]
@@ -0,0 +1,34 @@
+import manipulations
+from datasets import DatasetRegistry
+from instrumentation import metrics, rows_of_dataset
+from manipulations import BarChartBuilder
+
+
+def test_registry_loads_are_timed():
+    metrics.enable()
+    metrics.reset()
+    try:
+        DatasetRegistry().get(BarChartBuilder.sheet_name, BarChartBuilder.header)
+        timers = metrics.snapshot()["timers"]
+    finally:
+        metrics.disable()
+        metrics.reset()
+
+    for name in ("DatasetRegistry._read", "Datasets.read_sheet"):
+        assert timers[name]["calls"] == 1
+        assert timers[name]["rows_scanned"] == 152
+
+
+def test_row_counts_never_load_the_dataset(monkeypatch):
+    registry = DatasetRegistry()
+    monkeypatch.setattr(manipulations, "registry", registry)
+    builder = BarChartBuilder()
+
+    assert rows_of_dataset(None, builder) == 0
+    assert registry.stats()["size"] == 0
+    assert (registry.hits, registry.misses) == (0, 0)
+
+    builder.supply_bar_chart_info("Overall effectiveness")
+    lookups = (registry.hits, registry.misses)
+    assert rows_of_dataset(None, builder) == 152
+    assert (registry.hits, registry.misses) == lookups
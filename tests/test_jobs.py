@@ -0,0 +1,48 @@
+import threading
+
+from jobs import JobQueue
+
+
+def test_repeat_requests_merge_into_the_queued_run():
+    queue = JobQueue()
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def job(label: str):
+        runs.append(label)
+        started.set()
+        release.wait(5)
+        return label
+
+    try:
+        first = queue.submit("refresh", job, "first")
+        assert started.wait(5)
+        # The first run is already going, so the next request queues a second run, which absorbs the rest
+        second = queue.submit("refresh", job, "second")
+        assert queue.submit("refresh", job, "third") is second
+        assert queue.submit("refresh", job, "fourth") is second
+        assert queue.get_status()["refresh"]["state"] == "queued"
+
+        release.set()
+        assert (first.result(5), second.result(5)) == ("first", "second")
+        assert runs == ["first", "second"]
+        assert queue.get_status()["refresh"]["run"] == 2
+        assert queue.get_status()["refresh"]["state"] == "done"
+    finally:
+        release.set()
+        queue.shutdown()
+
+
+def test_a_failed_run_is_reported():
+    queue = JobQueue()
+
+    def job():
+        raise RuntimeError("broken workbook")
+
+    try:
+        queue.submit("refresh", job).exception(5)
+        status = queue.get_status()["refresh"]
+        assert status["state"] == "failed"
+        assert "broken workbook" in status["error"]
+    finally:
+        queue.shutdown()
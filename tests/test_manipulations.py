@@ -0,0 +1,87 @@
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from manipulations import (
+    BarChartBuilder,
+    LAFilter,
+    TableBuilder,
+    empty_distribution,
+    split_distributions,
+    summarize_distributions,
+)
+
+
+def assert_same_distribution(compact: pd.Series, full: pd.Series) -> None:
+    # Same categories in the same order, and so the same bar colours; compact indexes stay categorical
+    assert compact.index.tolist() == full.index.tolist()
+    assert compact.index.name == full.index.name
+    np.testing.assert_allclose(compact.to_numpy(dtype="float64"), full.to_numpy(dtype="float64"))
+
+
+def test_compact_frames_give_the_same_distributions_as_full_ones():
+    full, compact = BarChartBuilder(compact=False), BarChartBuilder(compact=True)
+    for option in full.get_dropdown_options():
+        assert_same_distribution(
+            compact.supply_bar_chart_info(option["value"]), full.supply_bar_chart_info(option["value"])
+        )
+
+    full, compact = LAFilter(compact=False), LAFilter(compact=True)
+    for local_authority in full.dataset["Local authority"].unique():
+        full_rows = full.filter_dataset_by_LA(local_authority)
+        compact_rows = compact.filter_dataset_by_LA(local_authority)
+        for option in full.get_la_effectiveness_dropdown_options():
+            assert_same_distribution(
+                compact.supply_la_level_bar_chart_info(compact_rows, option["value"]),
+                full.supply_la_level_bar_chart_info(full_rows, option["value"]),
+            )
+        for field in ("provision_types", "places_by_provision_type"):
+            assert_same_distribution(
+                getattr(compact.get_la_statistics(local_authority), field),
+                getattr(full.get_la_statistics(local_authority), field),
+            )
+
+
+def test_compact_frames_give_the_same_summaries_as_full_ones():
+    for builder, summarize in ((BarChartBuilder, "summarize_effectiveness"), (LAFilter, "summarize_la_effectiveness")):
+        compact, full = getattr(builder(compact=True), summarize)(), getattr(builder(compact=False), summarize)()
+
+        pd.testing.assert_frame_equal(compact.astype(object), full.astype(object))
+
+
+def test_summaries_match_value_counts_per_column():
+    # Ties are ordered by first occurrence, as value_counts orders them: "b" before "a" in x, and in group 2
+    tied = pd.DataFrame({"group": [1, 1, 1, 2, 2, 2], "x": ["b", "a", "b", "a", "c", "c"], "y": [None] * 6})
+    dataset = LAFilter(compact=False).dataset
+    columns = [option["value"] for option in LAFilter(dataset).get_la_effectiveness_dropdown_options()]
+
+    for frame, names, by in ((tied, ["x", "y"], "group"), (dataset, columns, "Local authority")):
+        distributions = split_distributions(summarize_distributions(frame, names))
+        grouped = split_distributions(summarize_distributions(frame, names, by=by), by=by)
+        for column in names:
+            expected = frame[column].value_counts(normalize=True) * 100
+            pd.testing.assert_series_equal(distributions.get(column, empty_distribution(column)), expected)
+            for group, rows in frame.groupby(by, sort=False):
+                expected = rows[column].value_counts(normalize=True) * 100
+                actual = grouped.get((group, column), empty_distribution(column))
+                assert actual.index.tolist() == expected.index.tolist(), (group, column)
+                np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy())
+
+
+def test_la_index_lookups_match_filtering_the_frame():
+    dataset = LAFilter(compact=False).dataset
+    la_filter, table_builder = LAFilter(dataset), TableBuilder(dataset)
+
+    for local_authority in list(dataset["Local authority"].unique()) + ["Not an authority"]:
+        # The baseline: a boolean filter over the whole frame, then TableBuilder's totals over the result
+        expected = dataset[dataset["Local authority"] == local_authority]
+        pd.testing.assert_frame_equal(la_filter.filter_dataset_by_LA(local_authority), expected)
+
+        statistics = la_filter.get_la_statistics(local_authority)
+        assert statistics.facilities == table_builder.calculate_total_number_of_facilities(expected)
+        assert statistics.places == table_builder.calculate_total_number_of_places(expected)
+        pd.testing.assert_series_equal(
+            statistics.provision_types, table_builder.calculate_provision_types_breakdown(expected)
+        )
+        pd.testing.assert_series_equal(
+            statistics.places_by_provision_type, table_builder.calculate_places_by_provision_type(expected)
+        )
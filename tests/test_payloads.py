@@ -0,0 +1,11 @@
+import display
+from payloads import measure_payloads
+
+
+def test_measuring_payloads_keeps_the_response_mode(monkeypatch):
+    monkeypatch.setattr(display, "compact_responses", False)
+
+    report = measure_payloads()
+
+    assert display.compact_responses is False
+    assert all(ratio > 1 for ratio in report["reduction"].values())
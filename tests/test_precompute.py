@@ -0,0 +1,23 @@
+import pytest  # type: ignore
+
+from manipulations import BarChartBuilder, LAFilter
+from precompute import PrecomputedResponses, artifact_format
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_artifact_from_the_builders_is_current(compact):
+    artifact = {
+        "format": artifact_format,
+        "versions": {
+            "national": BarChartBuilder(compact=compact).dataset_version,
+            "provider": LAFilter(compact=compact).dataset_version,
+        },
+        "layout": {},
+        "effectiveness": {},
+        "la_statistics": {},
+        "la_effectiveness": {},
+    }
+    responses = PrecomputedResponses(artifact)
+
+    assert responses.is_current(compact)
+    assert not responses.is_current(not compact)
@@ -0,0 +1,80 @@
+import datetime
+
+from result_cache import ResultCache, SQLiteBackend
+
+
+class StrictRedis:
+    # Validates set() the way redis-py does, where ex must be an int or a timedelta
+
+    def __init__(self) -> None:
+        self.data: dict = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        if ex is not None and not isinstance(ex, (int, datetime.timedelta)):
+            raise TypeError("ex must be datetime.timedelta or int")
+        self.data[key] = value
+
+        return True
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def flushdb(self):
+        self.data.clear()
+
+        return True
+
+
+class Counter:
+    result_version = "v1"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def compute(self, value: int) -> int:
+        self.calls += 1
+
+        return value * 2
+
+
+def _memoized(cache: ResultCache):
+    return cache.memoize()(Counter.compute)
+
+
+def test_fractional_ttl_is_stored_by_a_redis_client():
+    cache = ResultCache(StrictRedis(), ttl=0.5)
+    compute = _memoized(cache)
+    counter = Counter()
+
+    assert compute(counter, 2) == 4
+    assert compute(counter, 2) == 4
+    assert counter.calls == 1
+    assert cache.stats()["errors"] == 0
+
+
+def test_sqlite_hits_do_not_write(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "results.sqlite"))
+    backend.set("key", b"value", ex=60)
+    connection = backend._connect()  # pylint: disable=protected-access
+    changes = connection.total_changes
+
+    for _ in range(10):
+        assert backend.get("key") == b"value"
+
+    assert connection.total_changes == changes
+
+
+def test_sqlite_evicts_least_recently_read(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "results.sqlite"), maxsize=2, evict_every=1000)
+    backend.set("old", b"1")
+    backend.set("read", b"2")
+    assert backend.get("old") == b"1"
+    backend.set("new", b"3")
+    backend.evict()
+
+    assert backend.get("read") is None
+    assert backend.get("old") == b"1"
+    assert backend.get("new") == b"3"
@@ -0,0 +1,20 @@
+import pandas as pd  # type: ignore
+
+from rollups import HIERARCHY, NATION, RollupBuilder
+
+
+def test_cube_breakdowns_match_value_counts():
+    for compact in (False, True):
+        builder = RollupBuilder(compact=compact)
+        dataset, cube = builder.dataset.astype(object), builder.get_rollup()
+        for option in builder.get_dropdown_options():
+            column = option["value"]
+            expected = {("Nation", NATION): dataset[column]}
+            for level in HIERARCHY:
+                expected.update(((level, area), rows[column]) for area, rows in dataset.groupby(level))
+
+            for (level, area), values in expected.items():
+                breakdown = cube.get_breakdown(column, level, area)
+                counts = values.value_counts(normalize=True) * 100
+                assert breakdown.index.tolist() == counts.index.tolist(), (level, area, column)
+                pd.testing.assert_series_equal(breakdown, counts, check_index_type=False, check_names=False)
@@ -0,0 +1,69 @@
+import os
+import shutil
+import time
+
+import dash  # type: ignore
+
+import datasets
+import display
+from benchmark import callback_requests
+from snapshots import SnapshotManager
+from synthetic import SyntheticOfstedGenerator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_touching_the_workbook_keeps_the_snapshot_version(tmp_path):
+    source = str(tmp_path / os.path.basename(datasets.filepath))
+    shutil.copyfile(os.path.join(ROOT, datasets.filepath), source)
+    manager = SnapshotManager(source)
+    version = manager.get_version()
+
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert manager.get_version() == version
+
+    with open(source, "ab") as target:
+        target.write(b"\0")
+    assert manager.get_version() != version
+
+
+def test_replacing_the_workbook_serves_the_new_version(tmp_path):
+    source, other = str(tmp_path / "workbook.xlsx"), str(tmp_path / "other.xlsx")
+    SyntheticOfstedGenerator(providers=300, local_authorities=10).write_excel(source)
+    builders = ("bar_chart_builder", "table_builder", "la_filter", "rollup_builder")
+    saved = {name: getattr(display, name) for name in builders}
+    app = dash.Dash(__name__)
+    manager = display.enable_hot_reload(app, source, interval=0.05)
+    try:
+        display.register_callbacks(app)
+        client = app.server.test_client()
+        body = callback_requests("Local authority 11", "Overall effectiveness", "Overall effectiveness")[
+            "display_la_level_provision_type_and_places_statistics"
+        ]
+
+        def serves_new_workbook() -> tuple[bool, bool]:
+            layout = client.get("/_dash-layout").get_data(as_text=True)
+            response = client.post("/_dash-update-component", json=body).get_data(as_text=True)
+
+            return "Local authority 11" in layout, "Total Number of Facilities: 0" not in response
+
+        version = manager.current.version
+        assert serves_new_workbook() == (False, False)
+
+        # Another workbook dropped next to the source is not what the dashboard reads, so it changes nothing
+        SyntheticOfstedGenerator(providers=300, local_authorities=12).write_excel(other)
+        time.sleep(0.5)
+        assert manager.current.version == version
+
+        os.replace(other, source)
+        deadline = time.monotonic() + 60
+        while manager.current.version == version and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert manager.current.version != version
+        assert serves_new_workbook() == (True, True)
+    finally:
+        manager.stop()
+        display.snapshot_manager = None
+        for name, value in saved.items():
+            setattr(display, name, value)
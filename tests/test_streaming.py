@@ -0,0 +1,64 @@
+import tracemalloc
+import zipfile
+
+import streaming
+
+HEAD = (
+    '<?xml version="1.0"?><office:document-content'
+    ' xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"'
+    ' xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"'
+    ' xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+    '<office:body><office:spreadsheet><table:table table:name="Sheet">'
+)
+TAIL = "</table:table></office:spreadsheet></office:body></office:document-content>"
+VALUE = '<table:table-cell office:value-type="float" office:value="{}"/>'
+
+
+def _write_ods(path: str, rows: str) -> str:
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("content.xml", HEAD + rows + TAIL)
+
+    return path
+
+
+def test_values_after_a_long_empty_run_keep_their_column(tmp_path):
+    row = VALUE.format(1) + '<table:table-cell table:number-columns-repeated="2000"/>' + VALUE.format(2)
+    empty_tail = '<table:table-cell table:number-columns-repeated="16000"/>'
+    path = _write_ods(str(tmp_path / "gap.ods"), f"<table:table-row>{row}{empty_tail}</table:table-row>")
+
+    (values,) = list(streaming.iter_ods_rows(path, "Sheet"))
+
+    assert len(values) == 2002
+    assert values[0] == 1 and values[-1] == 2
+
+
+def test_memory_does_not_grow_with_rows(tmp_path):
+    row = f"<table:table-row>{VALUE.format(1)}{VALUE.format(2)}</table:table-row>"
+    path = _write_ods(str(tmp_path / "rows.ods"), row * 200_000)
+
+    tracemalloc.start()
+    try:
+        rows = sum(1 for _ in streaming.iter_ods_rows(path, "Sheet"))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert rows == 200_000
+    assert peak < 2_000_000
+
+
+def test_repeated_empty_rows_above_the_header_keep_their_count(tmp_path):
+    text = '<table:table-cell office:value-type="string"><text:p>{}</text:p></table:table-cell>'
+    rows = (
+        f"<table:table-row>{text.format('Title')}</table:table-row>"
+        '<table:table-row table:number-rows-repeated="3"><table:table-cell/></table:table-row>'
+        f"<table:table-row>{text.format('a')}{text.format('b')}</table:table-row>"
+        f"<table:table-row>{VALUE.format(1)}{VALUE.format(2)}</table:table-row>"
+        '<table:table-row table:number-rows-repeated="1048000"><table:table-cell/></table:table-row>'
+    )
+    path = _write_ods(str(tmp_path / "blank.ods"), rows)
+
+    assert len(list(streaming.iter_ods_rows(path, "Sheet"))) == 6
+    frame = streaming.read_sheet(path, "Sheet", header=4)
+    assert frame.columns.tolist() == ["a", "b"]
+    assert frame.to_numpy().tolist() == [[1, 2]]